@@ -1,602 +1,279 @@
-import pygame
-import time
-import random
-import math
+from snake_engine import SnakeGame, make_state_int, acao_burra, direcao_atual, game_screen_weight, game_screen_width
+from q_table import TabelaQ, acao_aleatoria
+from monte_carlo import EpisodioMC
+from checkpoint import Checkpointer, carregar_checkpoint
+from cronometro import Cronometro
+from metricas import Metricas, causa_eventos, INTERROMPIDO
+from painel import abrir_painel
+from aleatorio import Aleatorio
+from gravacao import Gravador
+from demonstracoes import pretreinar
+from monte_carlo_paralelo import treinar_mc_paralelo
 
 
 
-#----------------------------------------------Inicializar pygame----------------------------------------------#
-pygame.init()
-
-
-
-
-#-------------------Posicoes disponíveis na tela do jogo-------------------#
-# Linhas : 0 -> 600 de 20 em 20
-# Colunas : 0 -> 600 colunas de 20 em 20
-posicoes_tela = set()
-for x in range(0, 600, 20):
-    for y in range(0, 600, 20):
-        posicoes_tela.add((x,y))
-#--------------------------------------------------------------------------#
-
-
-
-
-#------------------------Criando o display do jogo-------------------------#
-# Dimensões
-game_screen_weight = 600
-game_screen_width = 600
-
-# Inicializando objeto
-game_screen = pygame.display.set_mode((game_screen_weight, game_screen_width))
-pygame.display.update()
-#--------------------------------------------------------------------------#
-
-
-
-
-#----------------------------Criando a cobrinha----------------------------#
-# Corpo da cobrinha
-snake_list = []
-
-# Cor
-blue = (67,59,103)
-
-# Tamanho inicial da cobrinha
-snake_initial_height = 20
-snake_initial_width = 20
-length_of_snake = 1
-snake_block = 20
-
-# Posição
-snake_x, snake_y = random.choice(list(posicoes_tela))
-snake_list.append((snake_x, snake_y))
-
-# Mudança na posição a cada movimento
-snake_x_change = 0
-snake_y_change = 0
-
-# Velocidade da cobrinha
-snake_speed = 0
-#--------------------------------------------------------------------------#
-
-
-
-
-#-----------------------------Criando a comida-----------------------------#
-# Cor
-red = (200, 112, 126)
-
-# Posição
-food_x, food_y = random.choice(list(posicoes_tela - set(snake_list)))
-
-#Tamanho
-food_heigth = 20
-food_width = 20
-#--------------------------------------------------------------------------#
-
-
-
-
-#---------------------Componentes que aparecem na tela---------------------#
-# Pontuação
-score = 0
-
-# Definindo um font style para imprimir uma mensagem na tela
-font_style = pygame.font.SysFont(None, 50)
-def show_text(text, color):
-    text_object =  font_style.render(text, True, color)
-    game_screen.blit(text_object, [game_screen_weight/2 - 100, game_screen_width/2 - 50])
-    #pygame.display.update()
-#--------------------------------------------------------------------------#
-
-
-
-
-#----------------------------Analises de estado----------------------------#
-# Saber quando terminar o jogo
-game_over = False
-
-# Usado para congelar o tempo da repetição do laço while um tempo.
-clock = pygame.time.Clock()
-#--------------------------------------------------------------------------#
-
-
-
-
-#------------------------------Agente Humano-------------------------------#
-def human_player_agent(event, snake_x_change, snake_y_change):
-    if event.type == pygame.KEYDOWN:
-        if event.key == pygame.K_LEFT:
-            snake_x_change = -snake_block
-            snake_y_change = 0
-        elif event.key == pygame.K_RIGHT:
-            snake_x_change = snake_block
-            snake_y_change = 0
-        elif event.key == pygame.K_UP:
-            snake_y_change = -snake_block
-            snake_x_change = 0
-        elif event.key == pygame.K_DOWN:
-            snake_y_change = snake_block
-            snake_x_change = 0
-
-    return [snake_x_change, snake_y_change]
-#--------------------------------------------------------------------------#
-
-
-
-
-#------------------------Estados de jogo da cobrinha-----------------------#
-def make_state():
-
-    # Posicao da comida relativa a cobrinha
-    food_right = (snake_x - food_x < 0)
-    food_left = (snake_x - food_x > 0)
-    food_down = (snake_y - food_y < 0)
-    food_up = (snake_y  - food_y > 0)
-
-    # Direção que a cobrinha está se movendo
-    going_left = (snake_x_change < 0)
-    going_right = (snake_x_change > 0)
-    going_down = (snake_y_change > 0)
-    going_up = (snake_y_change < 0)
-
-
-    """"
-    Perigos #1: Paredes
-    Perigos #2: Corpo
-    """
-
-    # Se há parede do lado
-    wall_left = (snake_x - snake_block <= 0)
-    wall_right = (snake_x + snake_block >= game_screen_width)
-    wall_up = (snake_y - snake_block <= 0)
-    wall_down = (snake_y + snake_block >= game_screen_weight)
-
-    # Se há parede e está indo em direção a ela --Perigo--
-    #going_left_wall_ahead = going_left and wall_left
-    #going_right_wall_ahead = going_right and wall_right
-    #going_down_wall_ahead = going_down and wall_down
-    #going_up_wall_ahead = going_up and wall_up
-
-    # Perigo de uma parede
-    #wall_ahead = going_left_wall_ahead or going_right_wall_ahead or going_down_wall_ahead or going_up_wall_ahead
-
-    # Posição do corpo da cobrinha em relação a cabeça
-    body_left = ((snake_x - snake_block, snake_y) in snake_list)
-    body_right = ((snake_x + snake_block, snake_y) in snake_list)
-    body_down = ((snake_x, snake_y + snake_block) in snake_list)
-    body_up = ((snake_x, snake_y - snake_block) in snake_list)
-
-    # Se a cobrinha está indo em direção a uma parte do corpo
-    #going_left_body_ahead = going_left and body_left
-    #going_right_body_ahead = going_right and body_right
-    #going_down_body_ahead = going_down and body_down
-    #going_up_body_ahead = going_up and body_up
-
-    # Perigo de uma parte do corpo como obstáculo
-    #body_ahead = going_left_body_ahead or going_right_body_ahead or going_down_body_ahead or going_up_body_ahead
-
-    # Perigo em alguma direção
-    #danger_ahead = wall_ahead or body_ahead
-    danger_left = wall_left or body_left
-    danger_right = wall_right or body_right
-    danger_down = wall_down or body_down
-    danger_up = wall_up or body_up
-
-
-    # O estado é uma string de uma sequência de digitos que será recebido por uma
-    # função ação valor para decidir o movimento da cobrinha.
-    state = ''
-    state += str(int(food_left))
-    state += str(int(food_right))
-    state += str(int(food_down))
-    state += str(int(food_up))
-
-    state += str(int(going_left))
-    state += str(int(going_right))
-    state += str(int(going_down))
-    state += str(int(going_up))
-
-    #state += str(int(danger_ahead))
-    state += str(int(danger_left))
-    state += str(int(danger_right))
-    state += str(int(danger_down))
-    state += str(int(danger_up))
-    
-    return state
-#--------------------------------------------------------------------------#
-
-
-
-def get_action_vector(action):
-    if action == "LEFT":
-        return [-snake_block, 0]
-    
-    elif action == "RIGHT":
-        return [snake_block, 0]
-
-    elif action == "DOWN":
-        return [0, +snake_block]
-    
-    elif action == "UP":
-        return [0, -snake_block]
-
-
-
-def choose_action(ia_S):
-
-    epsilon = 40/(40 + ia_N_S.get(ia_S, 0))  ## Aumentar a cte 1 para testes
-    
-    value = random.random()
-    if value <= epsilon:
-        action = random.choice(["UP", "DOWN", "RIGHT", "LEFT"])
-        while [(-1)*snake_x_change, (-1)*snake_y_change] == get_action_vector(action):
-            action = random.choice(["UP", "DOWN", "RIGHT", "LEFT"])
-        return action
-    else:
-        # escolher melhor ação com base no valor do Q
-        best = -math.inf
-        best_a = ""
-        for a in ["UP", "DOWN", "RIGHT", "LEFT"]:
-            action_value = ia_Q[ia_S].get(a, 0)   # As ações que ainda não estao no dict para um dado estado, terão previsão 0
-            if action_value >= best:
-                best = action_value    
-                best_a = a
-        
-
-        # Escolher segunda melhor ação
-        second_best = -math.inf
-        second_best_a = ""
-        for a in ["UP", "DOWN", "RIGHT", "LEFT"]:
-            action_value = ia_Q[ia_S].get(a, 0)
-            if action_value >= second_best and a != best_a:
-                second_best = action_value
-                second_best_a = a
-        
-        # Se a melhor ação é o sentido contrário do movimento atual, a cobrinha morreria se fosse nessa direção.
-        if [(-1)*snake_x_change, (-1)*snake_y_change] == get_action_vector(best_a):
-            best_a = second_best_a
-                
-        
-        return best_a
-
-
-tentar_vertical = [0]
-def IA_burra(snake_x_change, snake_y_change):
-    
-
-    # Comida a direita
-    if snake_x - food_x < 0:
-        if (snake_x + snake_block, snake_y) not in snake_list:
-            snake_x_change = snake_block
-            snake_y_change = 0
-
-        else:
-            if (snake_y > 350):
-                if (snake_x, snake_y - snake_block) not in snake_list:
-                    snake_y_change = -snake_block
-                else:
-                    snake_y_change = snake_block
-            else:
-                if (snake_x, snake_y + snake_block) not in snake_list:
-                    snake_y_change = snake_block
-                else:
-                    snake_y_change = -snake_block
-            snake_x_change = 0
-        
-
-    # Comida a esquerda
-    elif snake_x - food_x > 0:
-        if (snake_x - snake_block, snake_y) not in snake_list:
-            snake_x_change = -snake_block
-            snake_y_change = 0
-
-        else:
-            if (snake_y > 350):
-                if (snake_x, snake_y - snake_block) not in snake_list:
-                    snake_y_change = -snake_block
-                else:
-                    snake_y_change = snake_block
-            else:
-                if (snake_x, snake_y + snake_block) not in snake_list:
-                    snake_y_change = snake_block
-                else:
-                    snake_y_change = -snake_block
-            snake_x_change = 0
-                
-    
-
-    elif (snake_x == food_x):
-
-        # Comida abaixo
-        if snake_y - food_y < 0:
-            if (snake_x, snake_y + snake_block) not in snake_list:
-                tentar_vertical[0] = 0
-                snake_y_change = snake_block
-                snake_x_change = 0
-            else:
-                tentar_vertical[0] += 1
-                if (snake_x < 350):
-                    if (snake_x + snake_block, snake_y) not in snake_list:
-                        snake_x_change = snake_block
-                    else:
-                        snake_x_change = -snake_block
-                else:
-                    if (snake_x - snake_block, snake_y) not in snake_list:
-                        snake_x_change = -snake_block
-                    else:
-                        snake_x_change = snake_block
-                snake_y_change = 0
-
-        # Comida acima
-        if snake_y - food_y > 0:
-            if (snake_x, snake_y - snake_block) not in snake_list:
-                tentar_vertical[0] = 0
-                snake_y_change = -snake_block
-                snake_x_change = 0
-            else:
-                tentar_vertical[0] += 1
-                if (snake_x < 350):
-                    if (snake_x + snake_block, snake_y) not in snake_list:
-                        snake_x_change = snake_block
-                    else:
-                        snake_x_change = -snake_block
-                else:
-                    if (snake_x - snake_block, snake_y) not in snake_list:
-                            snake_x_change = -snake_block
-                    else:
-                        snake_x_change = snake_block
-                snake_y_change = 0
-    
-    return (snake_x_change, snake_y_change)
-
-
-def get_vector_action(snake_vector):
-    if snake_vector == [-snake_block, 0]:
-        return "LEFT"
-    
-    elif snake_vector == [snake_block, 0]:
-        return "RIGHT"
-
-    elif snake_vector == [0, +snake_block]:
-        return "DOWN"
-    
-    elif snake_vector == [0, -snake_block]:
-        return "UP"
-
 #----------------------Repetição do jogo em vários episódios para treinar a IA---------------------#
 
+
+#-------------------- Parametros do jogo----------------------#
+usar_janela = True    # False em máquinas sem tela: o pygame nem é carregado
+fps_tela = 30         # Quadros por segundo desenhados com show_image; a simulação não espera a tela
 Bot_Jogando = True
 show_image = False
+snake_speed = 0
 episode_count = 0
 episodes = 10000000
-ia_Q = {}
-ia_N_S_A = {}
-ia_N_S = {}
-gamma = 0.2
+tabela = TabelaQ(valor_padrao=0)   # ia_Q, ia_N_S_A e ia_N_S
+gamma = 0.99   # Desconto do retorno de cada passo: G_t = r_t + gamma*G_{t+1}
 max_score = 1
 
-while episode_count < episodes:
-    # Fim de jogo
-    game_over = False
-
-    # Cobrinha
-    snake_list = []
-    snake_x_change = 0
-    snake_y_change = 0
-    snake_x, snake_y = random.choice(list(posicoes_tela))
-    snake_list.append((snake_x, snake_y))
-    length_of_snake = 1
-    fuel = 10
-    passos = 0
-    
-
-    #comida
-    food_x, food_y = random.choice(list(posicoes_tela - set(snake_list)))
-
-    # Distancia inicial da cobrinha a comida
-    dist = (snake_x - food_x)*(snake_x - food_x) + (snake_y - food_y)*(snake_y - food_y)
-
-    # Pontuação e número de episódios
-    score = 1
-    episode_count += 1
-
-    # Estados e pontuação da IA
-    ia_R = []
-    ia_G = 0
-
-    #Estados de um episódio
-    states_and_actions_visited = []
-
-    # Numero de açoes do episodio
-    n_acoes_episodio = 0
-
-
-    #---------------------Loop para manter o jogo rodando----------------------#
-    while not game_over:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                game_over = True
-                break
-            
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_KP_MINUS:
+# Semente do treino: a posição inicial e a comida saem do gerador do jogo (jogo.rng) e a
+# exploração de um gerador só dela, filho do primeiro. None sorteia uma; com um inteiro o
+# treino se repete bit a bit.
+semente = None
+
+# Gravação de episódios (gravacao.py): as células sorteadas (posição inicial e comidas)
+# e as ações, 2 bits por passo, vão para arquivo_gravacao; "recorde" grava só os
+# episódios que batem o max_score, "todos" grava todos e None desliga. Para rever um episódio:
+#   python gravacao.py gravacoes/monte_carlo.bin --episodio N
+gravar = "recorde"
+arquivo_gravacao = "gravacoes/monte_carlo.bin"
+
+# Checkpoints: a cada episodios_checkpoint episódios a tabela, o episódio, o max_score e
+# o jogo (com o estado do gerador dele) e o gerador da exploração vão para pasta_checkpoint, e o treino continua
+# dali se for reiniciado. 0 desliga.
+pasta_checkpoint = "checkpoints/monte_carlo"
+episodios_checkpoint = 10000
+
+# Com n_processos > 1 os episódios são jogados sem janela por vários processos com uma cópia
+# da política, e as trajetórias voltam para este processo, que atualiza a tabela em lote
+# (monte_carlo_paralelo.py).
+n_processos = 1
+
+# Primeira visita (só a primeira ocorrência de cada estado e ação no episódio conta) ou
+# toda visita, com ou sem processos.
+primeira_visita = False
+
+# Pré-treino: num treino novo (sem checkpoint), episodios_pretreino jogos do IA_burra
+# são jogados sem tela, em lote no SnakeVecEnv e em processos_pretreino processos, e passam
+# pela mesma atualização do treino (a média do Monte Carlo), para a tabela e as contagens de
+# visita não começarem vazias (demonstracoes.py). 0 desliga.
+episodios_pretreino = 0
+processos_pretreino = 1
+
+# Um registro por episódio (score, passos, causa do fim, epsilon, hora) vai para
+# arquivo_metricas em lotes; na memória ficam só os últimos janela_metricas scores. O
+# resumo (média, percentis, melhor score) é impresso no máximo a cada intervalo_print segundos.
+# A tecla g abre o painel (painel.py), que lê esse arquivo num processo separado.
+arquivo_metricas = "metricas/monte_carlo.bin"
+janela_metricas = 1000
+intervalo_print = 1.0
+
+# Com medir_fases = True o tempo do laço é dividido por fase (estado, ação, física,
+# comida, tela, aprendizado, ...) e um resumo é impresso a cada episodios_fases episódios.
+medir_fases = False
+episodios_fases = 1000
+
+# Recompensa de cada evento do jogo
+RECOMPENSAS = {"parede": -20, "comida": 10, "corpo": -20, "limite": -30}
+#-------------------- Parametros do jogo-----------------------#
+
+
+if __name__ == "__main__":
+    jogo = SnakeGame(semente=semente)
+    # Com semente = None vale a que o jogo sorteou; ela vai nos checkpoints
+    semente = jogo.rng.sequencia.entropy
+    rng = Aleatorio(jogo.rng.semente_filha())
+
+    checkpointer = None
+    if episodios_checkpoint:
+        salvo = carregar_checkpoint(pasta_checkpoint)
+        if salvo is not None:
+            arrays, estado = salvo
+            tabela.carregar_arrays(arrays)
+            episode_count = estado["episode_count"]
+            max_score = estado["max_score"]
+            semente = estado.get("semente", semente)
+            jogo = estado.get("jogo", jogo)
+            rng = estado.get("rng", rng)
+            print("Continuando do episodio " + str(episode_count))
+        checkpointer = Checkpointer(pasta_checkpoint)
+
+    if episodios_pretreino and episode_count == 0:
+        pretreinar(tabela, episodios_pretreino, RECOMPENSAS, "mc", 0.0, 0.00001, gamma, n_processos=processos_pretreino, semente=semente)
+
+    metricas = Metricas(arquivo_metricas, janela_metricas, intervalo_print=intervalo_print)
+    metricas.melhor = max_score
+    gravador = Gravador(arquivo_gravacao, gravar, max_score) if gravar else None
+    painel = None
+
+    cronometro = Cronometro(medir_fases, episodios_fases)
+    jogo.cronometro = cronometro if medir_fases else None
+
+    tela = None
+    sair = False
+    if n_processos > 1:
+        episode_count, max_score = treinar_mc_paralelo(tabela, n_processos, episodes, RECOMPENSAS, 40, primeira_visita, gamma,
+                                                       semente=semente, episode_count=episode_count, max_score=max_score, metricas=metricas,
+                                                       checkpointer=checkpointer, episodios_checkpoint=episodios_checkpoint)
+        sair = True
+    elif usar_janela:
+        from snake_render import Tela
+        tela = Tela(game_screen_weight, game_screen_width, fps_tela)
+
+    def salvar():
+        checkpointer.salvar(episode_count, tabela.arrays(), {
+            "episode_count": episode_count,
+            "max_score": max_score,
+            "semente": semente,
+            "jogo": jogo,
+            "rng": rng,
+        })
+
+    # Estados, ações e recompensas do episódio
+    episodio = EpisodioMC(tabela, gamma, primeira_visita)
+
+    while episode_count < episodes and not sair:
+        if gravador is not None:
+            gravador.iniciar(jogo)
+        jogo.reset()
+        cronometro.marcar("fisica")
+        fuel = 10
+
+        # Distancia inicial da cobrinha a comida
+        dist = jogo.distancia2()
+
+        # Número de episódios
+        episode_count += 1
+
+        episodio.iniciar()
+
+        # Numero de açoes do episodio
+        n_acoes_episodio = 0
+        soma_epsilon = 0
+
+
+        #---------------------Loop para manter o jogo rodando----------------------#
+        while not jogo.game_over:
+            comandos = tela.comandos() if tela is not None else []
+            for comando in comandos:
+                if comando == "sair":
+                    jogo.game_over = True
+                    sair = True
+
+                if comando == "mais_devagar":
                     if(snake_speed >= 10):
                         snake_speed -= 10
-                
-                if event.key == pygame.K_KP_PLUS:
+
+                if comando == "mais_rapido":
                     snake_speed += 10
-                
-                if event.key == pygame.K_s:
+
+                if comando == "mostrar":
                     show_image = True
 
-                if event.key == pygame.K_f:
+                if comando == "esconder":
                     show_image = False
-                
-                if event.key == pygame.K_b:
+
+                if comando == "bot":
                     Bot_Jogando = True
-                
-                if event.key == pygame.K_i:
-                    Bot_Jogando = False
 
+                if comando == "ia":
+                    Bot_Jogando = False
 
-        ia_S = make_state()
-        ia_A = ""
-        if (Bot_Jogando):
-            snake_x_change, snake_y_change = IA_burra(snake_x_change, snake_y_change)
-            ia_A = get_vector_action([snake_x_change, snake_y_change])
+                if comando == "grafico":
+                    # O painel roda em outro processo e lê o arquivo de métricas
+                    if painel is None or painel.poll() is not None:
+                        metricas.escrever()
+                        painel = abrir_painel(arquivo_metricas)
+            cronometro.marcar("eventos")
 
 
-        else:
-            # Estado atual
-            #ia_S = make_state()
-            # Ação escolhida pelo Monte carlo para aquele estado
-            ia_A = choose_action(ia_S)
+            ia_S = make_state_int(jogo)
+            cronometro.marcar("estado")
+            if (Bot_Jogando):
+                ia_A = acao_burra(jogo)
+                acao = ia_A
 
-            # Se tem energia suficiente, usa o monte carlo, senão sorteia uma ação aleatória. Objetivo : Evitar loops infinitos.
-            if (fuel > 0):
-                vector_action = get_action_vector(ia_A)
             else:
-                vector_action = get_action_vector(random.choice(["UP", "DOWN", "RIGHT", "LEFT"]))
-                while [(-1)*snake_x_change, (-1)*snake_y_change] == vector_action:
-                    vector_action = get_action_vector(random.choice(["UP", "DOWN", "RIGHT", "LEFT"]))
-                fuel = 10
+                # Ação escolhida pelo Monte carlo para aquele estado
+                ia_A = tabela.choose_action(ia_S, direcao_atual(jogo), 40, rng)
+                soma_epsilon += 40/(40 + tabela.N_S[ia_S])
 
-            snake_x_change = vector_action[0]
-            snake_y_change = vector_action[1]
-        
+                # Se tem energia suficiente, usa o monte carlo, senão sorteia uma ação aleatória. Objetivo : Evitar loops infinitos.
+                acao = ia_A
+                if (fuel <= 0):
+                    acao = acao_aleatoria(jogo.direcao, rng)
+                    fuel = 10
 
+            cronometro.marcar("acao")
 
-        # Atualizar posição da cobrinha
-        snake_x = snake_x + snake_x_change
-        snake_y = snake_y + snake_y_change
 
-        #ia_R.append(0.01) # (Ou usa isso, o a analise de distancias da cobrinha até a comida.)
+            eventos = jogo.step_acao(acao)
+            if gravador is not None:
+                gravador.registrar(acao)
+            cronometro.marcar("fisica")
 
-        # A cada movimento perde 1 de energia. 900 é o numero de quadrados disponivies na tela.
-        fuel -= 0.0111
+            # A cada movimento perde 1 de energia. 900 é o numero de quadrados disponivies na tela.
+            fuel -= 0.0111
 
-        #Punições de acordo com a distancia da cobrinha a comida
-        dist_atual = (snake_x - food_x)*(snake_x - food_x) + (snake_y - food_y)*(snake_y - food_y)
-        ia_R.append((dist - dist_atual)*0.00001)
-        
+            #Punições de acordo com a distancia da cobrinha a comida
+            dist_atual = jogo.distancia2()
+            ia_R = (dist - dist_atual)*0.00001
 
-        # Terminar o jogo quando a cobrinha encosta nas bordas.
-        if snake_x >= game_screen_width or snake_x < 0 or snake_y >= game_screen_weight or snake_y < 0 :
-            game_over = True
-            if show_image:
-                show_text("Episodio: " + str(episode_count), [0,0,0])
-            time.sleep(0)
-            #del ia_R[-1]
-            ia_R.append(-20)
-        
-
-        # Sortear nova posição da comida quando a cobrinha come
-        if snake_x == food_x and snake_y == food_y:
-            posicoes_disponiveis = list(posicoes_tela - set(snake_list))
-            food_x, food_y = random.choice(posicoes_disponiveis)
-            
-            length_of_snake += 1
-            score += 1
-            if score > max_score:
-                max_score = score
-
-            #del ia_R[-1]
-            ia_R.append(10)  # A IA recebe como recompensa por comer a energia restante. Logo, quanto menos ela demorar para comer,
-            fuel = 10   # mais pontos ela ganha. Ao comer a energia volta para 900.
-            passos = 0
-
-        
-
-        # Redesenhar a cobrinha
-        snake_head = (snake_x, snake_y)
-        snake_list.append(snake_head)
-        
-        len_snake = len(snake_list)
-        if (len_snake == 2 and snake_list[0] == snake_list[1]):
-            del snake_list[0]
-            len_snake -= 1
-
-        
-        for x in snake_list[:-1]:
-            if x == snake_head:
-                game_over = True
-                if show_image:
-                    show_text("Episodio: " + str(episode_count), [0,0,0])
-                time.sleep(0)
-                #del ia_R[-1]
-                ia_R.append(-20)
-        
-        if len_snake > length_of_snake:
-            del snake_list[0]
-
-
-        n_acoes_episodio += 1
-        passos += 1
-        if passos == 1000:
-            game_over = True
-            ia_R.append(-30)
-
-
-        if show_image:
-            # Limpar a tela antes de colocar na tela a nova posição da cobrinha e da comida.
-            game_screen.fill([158, 206, 225])
-            for x in snake_list:
-                pygame.draw.rect(game_screen, blue, [x[0], x[1], snake_block, snake_block])
-
-            pygame.draw.rect(game_screen, red, [food_x, food_y, food_heigth, food_width])
-
-
-            # Pontuações
-            value = font_style.render("Score: " + str(score), True, [255,255,255])
-            game_screen.blit(value, [0, 0])
-            value = font_style.render("Best Score: " + str(max_score), True, [255,255,255])
-            game_screen.blit(value, [150, 0])
-            value = font_style.render("Ep: " + str(episode_count), True, [255,255,255])
-            game_screen.blit(value, [400, 0])
-
-            pygame.display.update()
-
-
-        states_and_actions_visited.append((ia_S, ia_A))
-        dist = dist_atual
-
-        # Atualizar o display e congelar brevemente o tempo
-        clock.tick(snake_speed)
-    #--------------------------------------------------------------------------#
+            for evento in eventos:
+                ia_R += RECOMPENSAS[evento]
 
+                # A IA recebe como recompensa por comer a energia restante. Logo, quanto menos ela demorar para comer,
+                # mais pontos ela ganha. Ao comer a energia volta para 900.
+                if evento == "comida":
+                    fuel = 10
 
-    #---------------------Aprender/ Atualizar o ia_Q---------------------------#
-    print("Episode : " + str(episode_count) + "  Score :" + str(score) + "  Best Score :" + str(max_score))
-    # Soma das recompensas
-    # Soma das recompensas
-    for r in ia_R:
-        ia_G = ia_G*1.01 + r
-
-    #for index, r in enumerate(ia_R):
-    #    ia_G += r*pow(0.99, index)
-    
-    for s, a in states_and_actions_visited:
-        if s in ia_Q.keys():
-            ia_N_S[s] += 1
-            if a in ia_N_S_A.keys():
-                ia_N_S_A[s][a] += 1
-                ia_Q[s][a] += (ia_G - ia_Q[s][a])/(ia_N_S_A)
-            else:
-                ia_Q[s][a] = ia_G
-                ia_N_S_A[s][a] = 1
-        else:
-            ia_Q[s] = dict()
-            ia_Q[s][a] = ia_G
-            ia_N_S_A[s] = dict()
-            ia_N_S_A[s][a] = 1
-            ia_N_S[s] = 1
-            
-
-#------------------------------Fechar o jogo-------------------------------#
-pygame.quit()
-quit()
-#--------------------------------------------------------------------------#
+            if jogo.score > max_score:
+                max_score = jogo.score
+
+            n_acoes_episodio += 1
+            episodio.registrar(ia_S, ia_A, ia_R)
+            dist = dist_atual
+            cronometro.marcar("aprendizado")
+
+
+            if show_image:
+                if tela.desenhar(jogo, max_score, episode_count) and jogo.game_over:
+                    tela.show_text("Episodio: " + str(episode_count), [0,0,0])
+            cronometro.marcar("tela")
+
+            # Congelar brevemente o tempo
+            if tela is not None:
+                tela.tick(snake_speed)
+            cronometro.marcar("tela")
+        #--------------------------------------------------------------------------#
+
+
+        #---------------------Aprender/ Atualizar o ia_Q---------------------------#
+        # Retorno de cada passo e média incremental de todos os pares do episódio de uma vez
+        episodio.terminar()
+        cronometro.marcar("aprendizado")
+
+        # Com a janela fechada o passo do fim não diz nada sobre como o episódio acabaria
+        causa = INTERROMPIDO if sair else causa_eventos(eventos, jogo.game_over)
+        metricas.registrar(episode_count, jogo.score, n_acoes_episodio, causa,
+                           soma_epsilon/max(n_acoes_episodio, 1))
+        if gravador is not None:
+            gravador.terminar(jogo, episode_count)
+        if checkpointer is not None and episode_count % episodios_checkpoint == 0:
+            salvar()
+        cronometro.marcar("log")
+        cronometro.fim_episodio(episode_count)
+
+
+    #------------------------------Fechar o jogo-------------------------------#
+    metricas.fechar()
+    if gravador is not None:
+        gravador.fechar()
+    if checkpointer is not None:
+        salvar()
+        checkpointer.fechar()
+    if tela is not None:
+        tela.fechar()
+    #--------------------------------------------------------------------------#
 #--------------------------------------------------------------------------------------------------------------#
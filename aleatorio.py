@@ -0,0 +1,107 @@
+from itertools import chain
+from operator import length_hint
+
+import numpy as np
+
+
+
+#--------------------------Números aleatórios em blocos--------------------------#
+# Um gerador por jogo, com semente própria, no lugar do módulo random global.
+# Os números saem de blocos de `bloco` floats em [0, 1) gerados de uma vez pelo NumPy
+# (PCG64) e entregues um a um por um iterador em C: random() custa uma chamada de
+# __next__, sem Python por número; só a troca de bloco passa por Python.
+#
+# random() tem a mesma cara de random.random, então quem recebe um rng aceita tanto um
+# Aleatorio quanto o próprio módulo random. Para sortear um índice de 0 a n-1 use
+# int(rng.random()*n).
+#
+# Um Aleatorio pode ir para um pickle (checkpoint, outro processo): ele guarda o estado
+# do PCG64 de antes do bloco atual e quantos números do bloco já saíram, e na volta
+# gera o mesmo bloco de novo e pula esses números. A sequência continua bit a bit igual.
+# estado() e restaurar() dão o mesmo ponto da sequência sem o resto do objeto.
+#
+# semente pode ser um inteiro, None (semente do sistema) ou uma np.random.SeedSequence.
+# semente_filha() devolve sementes independentes para outros geradores (um por
+# processo, a memória de replay, ...), sempre as mesmas para a mesma semente.
+class Aleatorio:
+
+    def __init__(self, semente=None, bloco=4096):
+        if not isinstance(semente, np.random.SeedSequence):
+            semente = np.random.SeedSequence(semente)
+        self.sequencia = semente
+        self.tamanho_bloco = bloco
+        self.gerador = np.random.Generator(np.random.PCG64(semente))
+        self._montar(self.gerador.bit_generator.state, 0)
+
+
+    def _montar(self, estado, usados):
+        self.gerador.bit_generator.state = estado
+        self._estado_bloco = estado
+        self._n_bloco = 0
+        self._iterador = iter(())
+        self.random = chain.from_iterable(self._blocos()).__next__
+        for _ in range(usados):
+            self.random()
+
+
+    def _blocos(self):
+        while True:
+            self._estado_bloco = self.gerador.bit_generator.state
+            bloco = self.gerador.random(self.tamanho_bloco).tolist()
+            self._n_bloco = len(bloco)
+            self._iterador = iter(bloco)
+            yield self._iterador
+
+
+    def semente_filha(self):
+        return self.sequencia.spawn(1)[0]
+
+
+    # (estado do PCG64 antes do bloco atual, números já usados do bloco, tamanho do bloco)
+    def estado(self):
+        return self._estado_bloco, self._n_bloco - length_hint(self._iterador), self.tamanho_bloco
+
+
+    def restaurar(self, estado_bloco, usados, tamanho_bloco):
+        self.tamanho_bloco = tamanho_bloco
+        self._montar(estado_bloco, usados)
+
+
+    def __getstate__(self):
+        estado_bloco, usados, tamanho_bloco = self.estado()
+        return {
+            "sequencia": self.sequencia,
+            "tamanho_bloco": tamanho_bloco,
+            "estado_bloco": estado_bloco,
+            "usados": usados,
+        }
+
+
+    def __setstate__(self, estado):
+        self.sequencia = estado["sequencia"]
+        self.gerador = np.random.Generator(np.random.PCG64())
+        self.restaurar(estado["estado_bloco"], estado["usados"], estado["tamanho_bloco"])
+#--------------------------------------------------------------------------------#
+
+
+
+
+#---------------------------------Sementes numeradas-----------------------------#
+# Sementes para quem precisa da mesma semente de novo depois de um resume, numerando
+# pelo contador de episódios que já vai no checkpoint: semente_numerada(semente, espaco,
+# indice...) é a filha de `semente` na posição (NUMERADAS, espaco, indice...) da árvore
+# do np.random.SeedSequence, sem gerar as anteriores. Com mais de um índice a numeração
+# desce um nível por índice.
+#
+# As filhas de semente_filha() são (0,), (1,), ...; nenhum contador chega a NUMERADAS,
+# então as sementes numeradas nunca repetem as delas. Cada caminho tem o seu espaço
+# abaixo de NUMERADAS, e dois caminhos não repetem as sementes um do outro.
+NUMERADAS = 2**32
+HOGWILD = 0
+TAREFAS_MC = 1
+PRETREINO = 2
+
+
+def semente_numerada(semente, espaco, *indice):
+    return np.random.SeedSequence(semente, spawn_key=(NUMERADAS, espaco) + indice)
+#--------------------------------------------------------------------------------#
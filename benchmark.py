@@ -0,0 +1,290 @@
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+from snake_engine import (SnakeGame, make_state, make_state_int, IA_burra, acao_burra, get_action_vector,
+                          get_vector_action, direcao_atual, ACOES, snake_block)
+from q_table import TabelaQ
+from monte_carlo import EpisodioMC
+from snake_vec_env import SnakeVecEnv
+
+
+
+#------------------------------------Medição------------------------------------#
+# Roda funcao() n vezes, repete e fica com a melhor repetição (a menos perturbada
+# pelo resto da máquina). Devolve nanossegundos por chamada.
+def medir(funcao, n, repeticoes=5):
+    melhor = math.inf
+    for _ in range(repeticoes):
+        inicio = time.perf_counter_ns()
+        for _ in range(n):
+            funcao()
+        melhor = min(melhor, time.perf_counter_ns() - inicio)
+    return melhor/n
+#-------------------------------------------------------------------------------#
+
+
+
+
+#----------------------------Referência com dicts-------------------------------#
+# O choose_action antigo do snake_engine, com ia_Q e ia_N_S em dicts e o módulo random
+# global, guardado só para a medida choose_action_dict: é a base com que a TabelaQ se
+# compara. Os scripts usam TabelaQ.choose_action com o gerador da exploração.
+def _choose_action_dict(jogo, ia_S, ia_Q, ia_N_S, cte_epsilon=3, valor_padrao=0):
+
+    epsilon = cte_epsilon/(cte_epsilon + ia_N_S.get(ia_S, 0))
+    contrario = [(-1)*jogo.snake_x_change, (-1)*jogo.snake_y_change]
+
+    value = random.random()
+    if value <= epsilon:
+        action = random.choice(ACOES)
+        while contrario == get_action_vector(action):
+            action = random.choice(ACOES)
+        return action
+    else:
+        # escolher melhor ação com base no valor do Q
+        best = -math.inf
+        best_a = ""
+        for a in ACOES:
+            action_value = ia_Q[ia_S].get(a, valor_padrao)
+            if action_value >= best:
+                best = action_value
+                best_a = a
+
+        # Escolher segunda melhor ação
+        second_best = -math.inf
+        second_best_a = ""
+        for a in ACOES:
+            action_value = ia_Q[ia_S].get(a, valor_padrao)
+            if action_value >= second_best and a != best_a:
+                second_best = action_value
+                second_best_a = a
+
+        # Se a melhor ação é o sentido contrário do movimento atual, a cobrinha morreria se fosse nessa direção.
+        if contrario == get_action_vector(best_a):
+            best_a = second_best_a
+
+        return best_a
+#-------------------------------------------------------------------------------#
+
+
+
+
+#----------------------------Jogo com tamanho escolhido-------------------------#
+# Monta um SnakeGame com uma cobrinha de `comprimento` segmentos em zigue-zague pelas
+# linhas do tabuleiro, cabeça no fim do caminho, e a comida na primeira célula livre.
+def montar_jogo(comprimento, semente=0):
+    jogo = SnakeGame(semente=semente)
+    tabuleiro = jogo.tabuleiro
+
+    caminho = []
+    for y in range(tabuleiro.altura):
+        xs = range(tabuleiro.largura) if y % 2 == 0 else range(tabuleiro.largura - 1, -1, -1)
+        for x in xs:
+            caminho.append(tabuleiro.celula(x, y))
+    corpo = caminho[:comprimento]
+
+    for celula in jogo.snake_list_celulas:
+        jogo.ocupado[celula] = 0
+        jogo.livres.adicionar(celula)
+    jogo.snake_list_celulas = deque(corpo)
+    for celula in corpo:
+        jogo.ocupado[celula] = 1
+        jogo.livres.remover(celula)
+    jogo.length_of_snake = comprimento
+    jogo.score = comprimento
+    jogo.cabeca = corpo[-1]
+    jogo.direcao = 2
+    if comprimento > 1:
+        jogo.direcao = tabuleiro.deslocamentos.index(corpo[-1] - corpo[-2])
+    jogo.comida = caminho[comprimento]
+    jogo.game_over = False
+    return jogo
+#-------------------------------------------------------------------------------#
+
+
+
+
+#---------------------------------Passos completos------------------------------#
+RECOMPENSAS = {"parede": -20, "comida": 10, "corpo": -20, "limite": -30}
+
+
+# Um passo do laço do Snake_game_igor_Q_learning.py (sem tela)
+def passo_q_learning(jogo, tabela):
+    ia_S = make_state_int(jogo)
+    ia_A = tabela.choose_action(ia_S, direcao_atual(jogo), 3, jogo.rng)
+    eventos = jogo.step_acao(ia_A)
+    ia_R = 0.01
+    for evento in eventos:
+        ia_R = RECOMPENSAS[evento]
+    tabela.atualizar_td(ia_S, ia_A, ia_R, make_state_int(jogo), 0.01, 1.01, jogo.game_over)
+
+
+# Um passo do laço do Snake_game_Monte_carlo.py (sem tela), mais a parte
+# dele na atualização do fim do episódio
+def passo_monte_carlo(jogo, tabela, episodio):
+    ia_S = make_state_int(jogo)
+    ia_A = tabela.choose_action(ia_S, direcao_atual(jogo), 40, jogo.rng)
+    dist = jogo.distancia2()
+    eventos = jogo.step_acao(ia_A)
+    dist_atual = jogo.distancia2()
+    ia_R = (dist - dist_atual)*0.00001
+    for evento in eventos:
+        ia_R += RECOMPENSAS[evento]
+    episodio.registrar(ia_S, ia_A, ia_R)
+    if jogo.game_over:
+        episodio.terminar()
+
+
+# Passos completos a partir de um jogo de `comprimento` segmentos; quando o jogo acaba
+# ele é montado de novo, fora da medição.
+def medir_passos(passo, comprimento, n):
+    total = 0
+    feitos = 0
+    jogo = montar_jogo(comprimento)
+    while feitos < n:
+        inicio = time.perf_counter_ns()
+        passo(jogo)
+        total += time.perf_counter_ns() - inicio
+        feitos += 1
+        if jogo.game_over:
+            jogo = montar_jogo(comprimento, feitos)
+    return total/n
+
+
+# Passos do IA_burra (estado, ação e movimento, mais o reset quando o jogo acaba)
+# num tabuleiro de lado x lado. Com nada percorrendo o tabuleiro, o tempo por passo
+# não deve crescer com a área.
+def medir_escala(lado, n, semente=0):
+    jogo = SnakeGame(lado, lado, semente=semente)
+
+    def passo():
+        make_state_int(jogo)
+        jogo.step_acao(acao_burra(jogo))
+        if jogo.game_over:
+            jogo.reset()
+
+    return medir(passo, n)
+#-------------------------------------------------------------------------------#
+
+
+
+
+#----------------------------------Suíte----------------------------------------#
+COMPRIMENTOS = [1, 10, 100, 400]
+LOTES_VEC = [1, 64, 512]
+TABULEIROS_VEC = [30, 60, 120]
+TABULEIROS_ESCALA = [30, 100, 300, 1000, 2000]
+
+
+def rodar(n=20000):
+    resultados = {}
+
+    for comprimento in COMPRIMENTOS:
+        jogo = montar_jogo(comprimento)
+        ia_S_str = make_state(jogo)
+        ia_S = make_state_int(jogo)
+        direcao = direcao_atual(jogo)
+        head = jogo.tabuleiro.vizinho(jogo.cabeca, direcao)
+
+        ia_Q = {ia_S_str: {a: random.random() for a in ACOES}}
+        ia_N_S = {ia_S_str: 10**9}
+        tabela = TabelaQ()
+        tabela.N_S[ia_S] = 10**9
+        tabela.N_S_A[ia_S] = 1
+        tabela.Q[ia_S] = np.random.random(len(ACOES))
+
+        sufixo = "/L=" + str(comprimento)
+        resultados["make_state" + sufixo] = medir(lambda: make_state(jogo), n)
+        resultados["make_state_int" + sufixo] = medir(lambda: make_state_int(jogo), n)
+        resultados["choose_action_dict" + sufixo] = medir(lambda: _choose_action_dict(jogo, ia_S_str, ia_Q, ia_N_S, 3, 0), n)
+        resultados["choose_action_tabela" + sufixo] = medir(lambda: tabela.choose_action(ia_S, direcao, 3, jogo.rng), n)
+        resultados["IA_burra" + sufixo] = medir(lambda: IA_burra(jogo), n)
+        resultados["acao_burra" + sufixo] = medir(lambda: acao_burra(jogo), n)
+        resultados["sortear_comida" + sufixo] = medir(jogo.sortear_livre, n)
+        resultados["colisao_corpo" + sufixo] = medir(lambda: jogo.ocupado[head], n)
+
+        tabela_q = TabelaQ(valor_padrao=math.inf)
+        resultados["passo_q_learning" + sufixo] = medir_passos(lambda jogo: passo_q_learning(jogo, tabela_q), comprimento, n)
+        tabela_mc = TabelaQ()
+        episodio = EpisodioMC(tabela_mc)
+        resultados["passo_monte_carlo" + sufixo] = medir_passos(lambda jogo: passo_monte_carlo(jogo, tabela_mc, episodio), comprimento, n)
+
+    resultados["get_action_vector"] = medir(lambda: get_action_vector("LEFT"), n)
+    resultados["get_vector_action"] = medir(lambda: get_vector_action([0, snake_block]), n)
+
+    # Passo do jogo em tabuleiros cada vez maiores
+    for lado in TABULEIROS_ESCALA:
+        resultados["escala_passo/lado=%d" % lado] = medir_escala(lado, n)
+
+    # Passo do SnakeVecEnv, por jogo
+    for lado in TABULEIROS_VEC:
+        for lote in LOTES_VEC:
+            env = SnakeVecEnv(lote, lado, lado, semente=0)
+            rng = np.random.default_rng(0)
+            acoes = rng.integers(0, len(ACOES), (64, lote))
+            contador = [0]
+
+            def passo_vec():
+                env.step(acoes[contador[0] % 64])
+                contador[0] += 1
+
+            resultados["vec_env_passo/lado=%d/lote=%d" % (lado, lote)] = medir(passo_vec, max(n//lote, 50))/lote
+            resultados["vec_env_burra/lado=%d/lote=%d" % (lado, lote)] = medir(env.acoes_burra, max(n//lote, 50))/lote
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "maquina": platform.machine(),
+            "n": n,
+        },
+        "ns_por_passo": resultados,
+    }
+#-------------------------------------------------------------------------------#
+
+
+
+
+#---------------------------Comparação com uma base-----------------------------#
+# Devolve as medidas que ficaram mais de `tolerancia` (fração) mais lentas que a base.
+def comparar(atual, base, tolerancia):
+    regressoes = {}
+    for nome, valor in atual["ns_por_passo"].items():
+        anterior = base["ns_por_passo"].get(nome)
+        if anterior and valor > anterior*(1 + tolerancia):
+            regressoes[nome] = {"base": anterior, "atual": valor, "razao": valor/anterior}
+    return regressoes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks do passo do jogo e do treino")
+    parser.add_argument("--n", type=int, default=20000, help="chamadas por medida")
+    parser.add_argument("--saida", help="arquivo JSON para os resultados (padrão: stdout)")
+    parser.add_argument("--base", help="JSON de uma rodada anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="fração de piora aceita em relação à base")
+    args = parser.parse_args()
+
+    resultados = rodar(args.n)
+    texto = json.dumps(resultados, indent=2, sort_keys=True)
+    if args.saida:
+        with open(args.saida, "w") as arquivo:
+            arquivo.write(texto + "\n")
+    else:
+        print(texto)
+
+    if args.base:
+        with open(args.base) as arquivo:
+            regressoes = comparar(resultados, json.load(arquivo), args.tolerancia)
+        for nome, r in sorted(regressoes.items()):
+            print("REGRESSAO %s: %.0f ns -> %.0f ns (%.2fx)" % (nome, r["base"], r["atual"], r["razao"]), file=sys.stderr)
+        if regressoes:
+            sys.exit(1)
+#-------------------------------------------------------------------------------#
@@ -0,0 +1,125 @@
+import atexit
+import os
+import pickle
+import queue
+import shutil
+import threading
+
+import numpy as np
+
+
+
+#----------------------------------Formato em disco----------------------------------#
+# pasta/
+#   ULTIMO              -> nome do checkpoint mais recente (trocado de uma vez só)
+#   ep_000001234/
+#     Q.npy, N_S_A.npy, N_S.npy, ...   -> arrays em .npy, que podem ser abertos com mmap
+#     estado.pkl                       -> episode_count, max_score, estado do random, ...
+#
+# Cada checkpoint é escrito numa pasta nova e só depois o ULTIMO passa a apontar para
+# ele, então um processo que morre no meio da escrita deixa o anterior intacto.
+def salvar_checkpoint(pasta, nome, arrays, estado, manter=2):
+    os.makedirs(pasta, exist_ok=True)
+    destino = os.path.join(pasta, nome)
+    temporario = destino + ".tmp"
+    shutil.rmtree(temporario, ignore_errors=True)
+    os.makedirs(temporario)
+
+    for chave, array in arrays.items():
+        np.save(os.path.join(temporario, chave + ".npy"), array)
+    with open(os.path.join(temporario, "estado.pkl"), "wb") as arquivo:
+        pickle.dump(estado, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+
+    shutil.rmtree(destino, ignore_errors=True)
+    os.replace(temporario, destino)
+
+    ponteiro = os.path.join(pasta, "ULTIMO")
+    with open(ponteiro + ".tmp", "w") as arquivo:
+        arquivo.write(nome)
+    os.replace(ponteiro + ".tmp", ponteiro)
+
+    # Apagar os mais antigos
+    antigos = sorted(p for p in os.listdir(pasta) if p.startswith("ep_") and not p.endswith(".tmp"))
+    for antigo in antigos[:-manter]:
+        shutil.rmtree(os.path.join(pasta, antigo), ignore_errors=True)
+
+
+# Devolve (arrays, estado) do checkpoint mais recente, ou None se não houver nenhum.
+# Com mmap_mode="r" os arrays são lidos do disco só quando usados.
+def carregar_checkpoint(pasta, mmap_mode="r"):
+    ponteiro = os.path.join(pasta, "ULTIMO")
+    if not os.path.exists(ponteiro):
+        return None
+    with open(ponteiro) as arquivo:
+        origem = os.path.join(pasta, arquivo.read().strip())
+
+    arrays = {}
+    for nome in os.listdir(origem):
+        if nome.endswith(".npy"):
+            arrays[nome[:-4]] = np.load(os.path.join(origem, nome), mmap_mode=mmap_mode)
+    with open(os.path.join(origem, "estado.pkl"), "rb") as arquivo:
+        estado = pickle.load(arquivo)
+    return arrays, estado
+#------------------------------------------------------------------------------------#
+
+
+
+
+#-------------------------------Escrita em segundo plano-----------------------------#
+# salvar() só copia os arrays e o estado (rápido) e devolve; a escrita em disco fica
+# numa thread separada. Se um checkpoint ainda está sendo escrito quando o próximo
+# chega, o que estava esperando na fila é trocado pelo mais novo.
+class Checkpointer:
+
+    def __init__(self, pasta, manter=2):
+        self.pasta = pasta
+        self.manter = manter
+        self.fila = queue.Queue(maxsize=1)
+        self.erro = None
+        self.thread = threading.Thread(target=self._escrever, daemon=True)
+        self.thread.start()
+
+        # Se o script parar com uma exceção, o que estava na fila ainda é escrito
+        atexit.register(self.fechar)
+
+
+    def salvar(self, episode_count, arrays, estado):
+        if self.erro is not None:
+            raise self.erro
+
+        copia = {chave: np.array(array, copy=True) for chave, array in arrays.items()}
+        pedido = ("ep_%09d" % episode_count, copia, pickle.dumps(estado, protocol=pickle.HIGHEST_PROTOCOL))
+        while True:
+            try:
+                self.fila.put_nowait(pedido)
+                return
+            except queue.Full:
+                try:
+                    self.fila.get_nowait()
+                    self.fila.task_done()
+                except queue.Empty:
+                    pass
+
+
+    def _escrever(self):
+        while True:
+            pedido = self.fila.get()
+            try:
+                if pedido is None:
+                    return
+                nome, arrays, estado = pedido
+                salvar_checkpoint(self.pasta, nome, arrays, pickle.loads(estado), self.manter)
+            except Exception as e:
+                self.erro = e
+            finally:
+                self.fila.task_done()
+
+
+    # Espera terminar o que está na fila e encerra a thread
+    def fechar(self):
+        if self.thread.is_alive():
+            self.fila.put(None)
+            self.thread.join()
+        if self.erro is not None:
+            raise self.erro
+#------------------------------------------------------------------------------------#
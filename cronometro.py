@@ -0,0 +1,64 @@
+import time
+
+
+
+#------------------------------Tempo por fase do laço------------------------------#
+# marcar(fase) soma à fase o tempo desde a marcação anterior, então cada trecho do
+# laço fica com a fase marcada logo depois dele e nada fica de fora. Uma marcação é
+# uma leitura do relógio e uma soma num dict; desligado, marcar() não faz nada.
+#
+# Fases:
+#   "eventos"     -> leitura do teclado/janela
+#   "estado"      -> make_state_int
+#   "acao"        -> escolha da ação (IA, bot ou aleatória)
+#   "fisica"      -> jogo.step (menos a comida) e o reset do episódio
+#   "comida"      -> sorteio da nova comida, marcada de dentro do SnakeGame
+#   "tela"        -> desenhar e esperar o tick
+#   "aprendizado" -> recompensas e atualização TD ou o passe do Monte Carlo no fim do episódio
+#   "log"         -> print e checkpoints
+FASES = ("eventos", "estado", "acao", "fisica", "comida", "tela", "aprendizado", "log")
+
+
+def _nada(fase):
+    pass
+
+
+class Cronometro:
+
+    def __init__(self, ativo=True, episodios_relatorio=1000):
+        self.ativo = ativo
+        self.episodios_relatorio = episodios_relatorio
+        if not ativo:
+            self.marcar = _nada
+        self.zerar()
+
+
+    def zerar(self):
+        self.totais = dict.fromkeys(FASES, 0)
+        self.episodios = 0
+        self.ultimo = time.perf_counter_ns()
+
+
+    def marcar(self, fase):
+        agora = time.perf_counter_ns()
+        self.totais[fase] += agora - self.ultimo
+        self.ultimo = agora
+
+
+    def relatorio(self):
+        total = sum(self.totais.values()) or 1
+        linhas = ["Tempo por fase em " + str(self.episodios) + " episodios (" + str(round(total/1e9, 2)) + " s):"]
+        for fase in FASES:
+            linhas.append("  %-12s %10.1f ms  %5.1f %%" % (fase, self.totais[fase]/1e6, 100*self.totais[fase]/total))
+        return "\n".join(linhas)
+
+
+    # Chamado no fim de cada episódio; a cada episodios_relatorio imprime e zera.
+    def fim_episodio(self, episode_count):
+        if not self.ativo:
+            return
+        self.episodios += 1
+        if episode_count % self.episodios_relatorio == 0:
+            print(self.relatorio())
+            self.zerar()
+#----------------------------------------------------------------------------------#
@@ -0,0 +1,196 @@
+import multiprocessing as mp
+import queue
+
+import numpy as np
+
+from aleatorio import semente_numerada, PRETREINO
+from snake_engine import snake_block
+from snake_vec_env import SnakeVecEnv, PAREDE, CORPO, LIMITE
+
+
+
+#-------------------------------Jogos do IA_burra em lote-------------------------------#
+# Joga pelo menos n_episodios do IA_burra sem tela, n_envs jogos de cada vez no
+# SnakeVecEnv, e devolve aos poucos (é um gerador) blocos com as transições dos
+# episódios que terminaram, passo a passo na ordem do tempo (os n_envs jogos intercalados):
+#   (estados u16, acoes u8, recompensas, estados_ u16, fins, retornos, scores)
+# A recompensa segue a dos scripts de treino: a do evento (recompensas["comida"],
+# ["parede"], ["corpo"], ["limite"]) ou recompensa_passo, mais fator_distancia vezes
+# quanto a distância ao quadrado (em pixels) até a comida diminuiu. No passo que termina
+# o jogo a distância não conta, já que o jogo daquele lugar já foi reiniciado.
+# retornos é o retorno descontado de cada passo até o fim do seu episódio.
+#
+# Um bloco sai a cada passos_bloco passos do SnakeVecEnv, com os episódios que acabaram
+# desde o bloco anterior; os passos dos episódios ainda em andamento ficam para o próximo.
+# Na memória fica só um bloco e esse resto, não importa quantos episódios forem jogados.
+def jogar_demonstracoes(n_episodios, recompensas, recompensa_passo=0.01, fator_distancia=0.0, gamma=0.99,
+                        n_envs=256, max_passos=1000, passos_bloco=1000, semente=None):
+    env = SnakeVecEnv(n_envs, max_passos=max_passos, semente=semente)
+    valor_causa = np.zeros(LIMITE + 1)
+    valor_causa[PAREDE] = recompensas["parede"]
+    valor_causa[CORPO] = recompensas["corpo"]
+    valor_causa[LIMITE] = recompensas["limite"]
+
+    def distancia2():
+        return ((env.snake_x - env.food_x)**2 + (env.snake_y - env.food_y)**2)*snake_block**2
+
+    # O que sobrou do bloco anterior: as linhas desde o primeiro passo ainda não entregue,
+    # e quais passos delas ainda não foram entregues
+    resto = None
+    pendentes = np.zeros((0, n_envs), dtype=bool)
+
+    estados, acoes, ganhos, estados_, fins = [], [], [], [], []
+    scores = []
+    terminados = 0
+    S = env.estados()
+    dist = distancia2()
+    while terminados < n_episodios:
+        A = env.acoes_burra()
+        antes = env.score.copy()
+        _, terminou, causas, score = env.step(A)
+        S_ = env.estados()
+        dist_atual = distancia2()
+
+        R = np.where(score > antes, recompensas["comida"], recompensa_passo)
+        R = np.where(terminou, R, R + fator_distancia*(dist - dist_atual))
+        R = np.where(causas == PAREDE, valor_causa[PAREDE], R)
+        R = np.where(causas == CORPO, valor_causa[CORPO], R)
+        R = np.where(causas == LIMITE, valor_causa[LIMITE], R)
+
+        estados.append(S)
+        acoes.append(A)
+        ganhos.append(R)
+        estados_.append(S_)
+        fins.append(terminou)
+        scores.extend(score[terminou])
+        terminados += terminou.sum()
+        S = S_
+        dist = dist_atual
+
+        if len(fins) < passos_bloco and terminados < n_episodios:
+            continue
+
+        colunas = [np.array(estados, dtype=np.uint16), np.array(acoes, dtype=np.uint8), np.array(ganhos),
+                   np.array(estados_, dtype=np.uint16), np.array(fins)]
+        if resto is not None:
+            colunas = [np.concatenate([anterior, coluna]) for anterior, coluna in zip(resto, colunas)]
+        pendentes = np.concatenate([pendentes, np.ones((len(fins), n_envs), dtype=bool)])
+        bloco_ganhos, bloco_fins = colunas[2], colunas[4]
+
+        # Retornos de trás para frente, todos os jogos juntos; o fim de um episódio corta a
+        # soma. Os passos de episódios sem fim no bloco ficam com retornos errados, mas só
+        # saem num bloco seguinte, que os calcula de novo.
+        retornos = np.empty_like(bloco_ganhos)
+        seguinte = np.zeros(n_envs)
+        for t in range(len(bloco_ganhos) - 1, -1, -1):
+            seguinte = bloco_ganhos[t] + gamma*np.where(bloco_fins[t], 0.0, seguinte)
+            retornos[t] = seguinte
+
+        # Saem os passos ainda não entregues de episódios completos; o último episódio de
+        # cada jogo ainda está pela metade
+        episodio = np.cumsum(bloco_fins, axis=0) - bloco_fins
+        completos = (episodio < bloco_fins.sum(axis=0)) & pendentes
+        yield tuple(coluna[completos] for coluna in colunas + [retornos]) + (np.array(scores, dtype=np.int32),)
+
+        pendentes &= ~completos
+        linhas = np.flatnonzero(pendentes.any(axis=1))
+        corte = linhas[0] if len(linhas) else len(pendentes)
+        resto = [coluna[corte:] for coluna in colunas]
+        pendentes = pendentes[corte:]
+        estados, acoes, ganhos, estados_, fins = [], [], [], [], []
+        scores = []
+
+
+# Um processo: joga os seus episódios e manda os blocos pela fila, None no fim
+def _trabalhador(argumentos, fila):
+    for bloco in jogar_demonstracoes(**argumentos):
+        fila.put(bloco)
+    fila.put(None)
+
+
+# Os blocos dos processos, um de cada por vez, na ordem dos processos
+def _receber(filas, processos):
+    abertas = list(range(len(filas)))
+    while abertas:
+        for i in list(abertas):
+            while True:
+                try:
+                    bloco = filas[i].get(timeout=1)
+                    break
+                except queue.Empty:
+                    if not processos[i].is_alive():
+                        raise RuntimeError("o processo %d das demonstrações parou sem terminar" % i)
+            if bloco is None:
+                abertas.remove(i)
+            else:
+                yield bloco
+#----------------------------------------------------------------------------------------#
+
+
+
+
+#-----------------------------------------Pré-treino--------------------------------------#
+# Enche a tabela com os jogos do IA_burra antes do treino, para o aprendiz não começar do
+# zero. Os episódios são divididos entre n_processos processos e passam pela mesma
+# atualização do treino, um bloco de passos_bloco passos de cada vez (os processos
+# esperam enquanto dois blocos deles aguardam na fila):
+#   - metodo "mc": média incremental dos retornos (TabelaQ.atualizar_media_lote), que já
+#     conta as visitas;
+#   - metodo "td": as visitas são contadas uma vez por passo e as transições de cada bloco
+#     passam `varreduras` vezes pela atualização TD, em lotes de `lote` na ordem em que
+#     foram jogadas.
+# Devolve os scores dos episódios jogados.
+def pretreinar(tabela, n_episodios, recompensas, metodo="mc", recompensa_passo=0.01, fator_distancia=0.0,
+               gamma=0.99, alfa=0.01, varreduras=1, lote=32, n_envs=256, passos_bloco=1000, n_processos=1,
+               semente=None):
+    if metodo not in ("mc", "td"):
+        raise ValueError("metodo deve ser 'mc' ou 'td': " + str(metodo))
+    if semente is None:
+        semente = np.random.SeedSequence().entropy
+
+    por_processo = -(-n_episodios//n_processos)
+    argumentos = [dict(n_episodios=por_processo, recompensas=recompensas, recompensa_passo=recompensa_passo,
+                       fator_distancia=fator_distancia, gamma=gamma, n_envs=n_envs, passos_bloco=passos_bloco,
+                       semente=semente_numerada(semente, PRETREINO, i))
+                  for i in range(n_processos)]
+    processos = []
+    if n_processos > 1:
+        contexto = mp.get_context("spawn")
+        filas = [contexto.Queue(maxsize=2) for _ in range(n_processos)]
+        for i in range(n_processos):
+            processo = contexto.Process(target=_trabalhador, args=(argumentos[i], filas[i]), daemon=True)
+            processo.start()
+            processos.append(processo)
+        blocos = _receber(filas, processos)
+    else:
+        blocos = jogar_demonstracoes(**argumentos[0])
+
+    todos_scores = []
+    n_passos = 0
+    try:
+        for estados, acoes, ganhos, estados_, fins, retornos, scores in blocos:
+            todos_scores.append(scores)
+            n_passos += len(estados)
+            estados = estados.astype(np.int64)
+            acoes = acoes.astype(np.int64)
+            if metodo == "mc":
+                tabela.atualizar_media_lote(estados, acoes, retornos)
+            else:
+                np.add.at(tabela.N_S, estados, 1)
+                np.add.at(tabela.N_S_A, (estados, acoes), 1)
+                estados_ = estados_.astype(np.int64)
+                for _ in range(varreduras):
+                    for inicio in range(0, len(estados), lote):
+                        fim = inicio + lote
+                        tabela.atualizar_td_lote(estados[inicio:fim], acoes[inicio:fim], ganhos[inicio:fim],
+                                                 estados_[inicio:fim], fins[inicio:fim], alfa, gamma)
+    finally:
+        for processo in processos:
+            processo.terminate()
+            processo.join()
+    scores = np.concatenate(todos_scores)
+
+    print("Pre-treino : " + str(len(scores)) + " episodios do IA_burra, " + str(n_passos) + " passos"
+          + "  Media :" + str(round(scores.mean(), 2)) + "  Best Score :" + str(scores.max()))
+    return scores
+#----------------------------------------------------------------------------------------#
@@ -0,0 +1,190 @@
+import argparse
+import os
+import struct
+import time
+
+import numpy as np
+
+from snake_engine import SnakeGame, snake_block
+
+
+
+#-----------------------------------Formato em disco-----------------------------------#
+# Um episódio gravado são as células sorteadas pelo jogo (a posição inicial e cada
+# comida, de jogo.sorteios) mais as ações, 2 bits cada (4 por byte). O resto do jogo não
+# tem sorte nenhuma, então repetir as ações com essas células refaz o episódio inteiro.
+#
+# Cada episódio é um CABECALHO, n_sorteios células em uint32 e ceil(passos/4) bytes de
+# ações, um depois do outro; o arquivo só cresce.
+#   episodio, score, passos, largura, altura, max_passos, n_sorteios
+CABECALHO = struct.Struct("<qiiiiii")
+
+
+def empacotar(acoes):
+    acoes = np.frombuffer(bytes(acoes), dtype=np.uint8)
+    if len(acoes) and acoes.max() > 3:
+        raise ValueError("só as ações de ACOES (0 a 3) podem ser gravadas")
+    acoes = np.concatenate([acoes, np.zeros(-len(acoes) % 4, dtype=np.uint8)]).reshape(-1, 4)
+    return (acoes[:, 0] | (acoes[:, 1] << 2) | (acoes[:, 2] << 4) | (acoes[:, 3] << 6)).astype(np.uint8).tobytes()
+
+
+def desempacotar(dados, passos):
+    dados = np.frombuffer(dados, dtype=np.uint8)
+    return ((dados[:, None] >> np.array([0, 2, 4, 6], dtype=np.uint8)) & 3).ravel()[:passos]
+
+
+# Os episódios gravados no arquivo, um dict por episódio, lidos aos poucos
+def ler_gravacoes(caminho):
+    with open(caminho, "rb") as arquivo:
+        while True:
+            cabecalho = arquivo.read(CABECALHO.size)
+            if len(cabecalho) < CABECALHO.size:
+                return
+            episodio, score, passos, largura, altura, max_passos, n_sorteios = CABECALHO.unpack(cabecalho)
+            sorteios = arquivo.read(4*n_sorteios)
+            dados = arquivo.read((passos + 3)//4)
+            if len(sorteios) < 4*n_sorteios or len(dados) < (passos + 3)//4:
+                return
+            yield {
+                "episodio": episodio,
+                "score": score,
+                "passos": passos,
+                "largura": largura,
+                "altura": altura,
+                "max_passos": max_passos,
+                "sorteios": np.frombuffer(sorteios, dtype="<u4"),
+                "acoes": desempacotar(dados, passos),
+            }
+#---------------------------------------------------------------------------------------#
+
+
+
+
+#---------------------------------------Gravador---------------------------------------#
+# Grava todos os episódios (modo "todos") ou só os que batem o recorde (modo "recorde").
+# No laço de treino:
+#   gravador.iniciar(jogo) antes de jogo.reset(),
+#   gravador.registrar(acao) a cada passo (é o append de um bytearray),
+#   gravador.terminar(jogo, episodio) no fim do episódio.
+# Os recordes vão para o disco na hora; no modo "todos" a escrita passa pelo buffer do
+# arquivo e fechar() esvazia o que falta.
+class Gravador:
+
+    def __init__(self, caminho, modo="recorde", recorde=0):
+        if modo not in ("recorde", "todos"):
+            raise ValueError("modo deve ser 'recorde' ou 'todos': " + str(modo))
+        self.modo = modo
+        self.recorde = recorde
+        self.acoes = bytearray()
+        self.registrar = self.acoes.append
+        self.sorteios = []
+        if os.path.dirname(caminho):
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        self.arquivo = open(caminho, "ab")
+
+
+    def iniciar(self, jogo):
+        del self.acoes[:]
+        del self.sorteios[:]
+        jogo.sorteios = self.sorteios
+
+
+    def terminar(self, jogo, episodio):
+        novo = jogo.score > self.recorde
+        if novo:
+            self.recorde = jogo.score
+        if not (novo or self.modo == "todos"):
+            return
+
+        tabuleiro = jogo.tabuleiro
+        self.arquivo.write(CABECALHO.pack(
+            episodio, jogo.score, len(self.acoes), tabuleiro.largura, tabuleiro.altura, jogo.max_passos,
+            len(self.sorteios)))
+        self.arquivo.write(np.array(self.sorteios, dtype="<u4").tobytes())
+        self.arquivo.write(empacotar(self.acoes))
+        if novo:
+            self.arquivo.flush()
+
+
+    def fechar(self):
+        self.arquivo.close()
+#---------------------------------------------------------------------------------------#
+
+
+
+
+#--------------------------------------Repetição---------------------------------------#
+# Um jogo que tira a posição inicial e as comidas da gravação em vez do gerador
+class JogoGravado(SnakeGame):
+
+    def __init__(self, gravacao):
+        self.gravados = iter(gravacao["sorteios"].tolist())
+        self.episodio = gravacao["episodio"]
+        SnakeGame.__init__(self, gravacao["largura"], gravacao["altura"], gravacao["max_passos"])
+
+
+    def sortear_livre(self):
+        celula = next(self.gravados, None)
+        if celula is None:
+            raise ValueError("episódio %d sorteou mais células do que as gravadas" % self.episodio)
+        return celula
+
+
+# Refaz um episódio gravado e devolve o jogo depois do reset e depois de cada ação.
+# Se o score do fim não bater com o gravado, o arquivo não é deste jogo (outra versão
+# das regras, por exemplo) e um ValueError avisa.
+def reproduzir(gravacao):
+    jogo = JogoGravado(gravacao)
+    yield jogo
+    for acao in gravacao["acoes"].tolist():
+        jogo.step_acao(acao)
+        yield jogo
+    if jogo.score != gravacao["score"]:
+        raise ValueError("episódio %d terminou com score %d, gravado com %d"
+                         % (gravacao["episodio"], jogo.score, gravacao["score"]))
+
+
+# Desenha um episódio gravado a `velocidade` passos por segundo (0 = sem espera).
+# As teclas de velocidade dos scripts (+ e - do teclado numérico) também valem aqui.
+def mostrar(gravacao, velocidade=10):
+    from snake_render import Tela
+
+    tela = Tela(gravacao["largura"]*snake_block, gravacao["altura"]*snake_block, fps=10**6)
+    try:
+        for jogo in reproduzir(gravacao):
+            for comando in tela.comandos():
+                if comando == "sair":
+                    return
+                if comando == "mais_devagar" and velocidade >= 10:
+                    velocidade -= 10
+                if comando == "mais_rapido":
+                    velocidade += 10
+            tela.desenhar(jogo, gravacao["score"], gravacao["episodio"])
+            tela.tick(velocidade)
+        # O último quadro fica um pouco na tela antes de fechar
+        time.sleep(1)
+    finally:
+        tela.fechar()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Repete e desenha episódios gravados durante o treino")
+    parser.add_argument("caminho", nargs="?", default="gravacoes/q_learning.bin")
+    parser.add_argument("--episodio", type=int, help="episódio a mostrar (padrão: o último gravado)")
+    parser.add_argument("--velocidade", type=int, default=10, help="passos por segundo, 0 sem limite")
+    parser.add_argument("--listar", action="store_true", help="só lista os episódios do arquivo")
+    args = parser.parse_args()
+
+    escolhida = None
+    for gravacao in ler_gravacoes(args.caminho):
+        if args.listar:
+            print("Episodio : " + str(gravacao["episodio"]) + "  Score :" + str(gravacao["score"])
+                  + "  Passos :" + str(gravacao["passos"]))
+        elif args.episodio is None or gravacao["episodio"] == args.episodio:
+            escolhida = gravacao
+
+    if not args.listar:
+        if escolhida is None:
+            parser.exit(1, "nenhum episódio encontrado em " + args.caminho + "\n")
+        mostrar(escolhida, args.velocidade)
+#---------------------------------------------------------------------------------------#
@@ -0,0 +1,189 @@
+import multiprocessing as mp
+import queue
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from aleatorio import Aleatorio, semente_numerada, HOGWILD
+from snake_engine import SnakeGame, make_state_int, direcao_atual, ACOES, N_ESTADOS
+from q_table import TabelaQ
+from metricas import Metricas, causa_eventos
+
+
+
+#-----------------------------Tabela em memória compartilhada----------------------------#
+# Os arrays de uma TabelaQ (Q, N_S_A, N_S) em blocos de memória compartilhada. O processo
+# que cria passa nomes() para os outros, que abrem os mesmos blocos com TabelaCompartilhada(nomes).
+CAMPOS = (
+    ("Q", np.float64, (N_ESTADOS, len(ACOES))),
+    ("N_S_A", np.int64, (N_ESTADOS, len(ACOES))),
+    ("N_S", np.int64, (N_ESTADOS,)),
+)
+
+
+class TabelaCompartilhada:
+
+    def __init__(self, nomes=None, valor_padrao=0.0):
+        self.dono = nomes is None
+        self.blocos = {}
+        arrays = {}
+        for campo, tipo, forma in CAMPOS:
+            if self.dono:
+                tamanho = int(np.prod(forma))*np.dtype(tipo).itemsize
+                bloco = shared_memory.SharedMemory(create=True, size=tamanho)
+            else:
+                bloco = shared_memory.SharedMemory(name=nomes[campo])
+            self.blocos[campo] = bloco
+            arrays[campo] = np.ndarray(forma, dtype=tipo, buffer=bloco.buf)
+            if self.dono:
+                arrays[campo][:] = 0
+        self.tabela = TabelaQ(valor_padrao=valor_padrao, arrays=arrays)
+
+
+    def nomes(self):
+        return {campo: bloco.name for campo, bloco in self.blocos.items()}
+
+
+    def fechar(self):
+        # Os arrays apontam para os blocos; precisam sair antes do close
+        self.tabela = None
+        for bloco in self.blocos.values():
+            bloco.close()
+            if self.dono:
+                bloco.unlink()
+#----------------------------------------------------------------------------------------#
+
+
+
+
+#-------------------------------------Trabalhador----------------------------------------#
+# Cada processo joga seus próprios episódios e aplica a mesma atualização TD do
+# Snake_game_igor_Q_learning.py direto na tabela compartilhada, sem trava nenhuma
+# (Hogwild): escritas simultâneas na mesma célula podem se perder, o que é raro com
+# milhares de estados e não atrapalha a convergência.
+# Cada episódio vira (score, passos, causa, epsilon médio), o registro das Metricas, e
+# vai para o coordenador em lotes, para não pagar uma mensagem por episódio.
+def _trabalhador(nomes, valor_padrao, recompensas, alfa, gamma, cte_epsilon, semente, n_episodios, fila, parar, lote):
+    compartilhada = TabelaCompartilhada(nomes, valor_padrao)
+    tabela = compartilhada.tabela
+    jogo = SnakeGame(semente=semente)
+    rng = Aleatorio(jogo.rng.semente_filha())
+    episodios = []
+
+    try:
+        for _ in range(n_episodios):
+            if parar.is_set():
+                break
+
+            jogo.reset()
+            soma_epsilon = 0
+            while not jogo.game_over:
+                ia_S = make_state_int(jogo)
+                ia_A = tabela.choose_action(ia_S, direcao_atual(jogo), cte_epsilon, rng)
+                soma_epsilon += cte_epsilon/(cte_epsilon + tabela.N_S.item(ia_S))
+                eventos = jogo.step_acao(ia_A)
+
+                ia_R = 0.01
+                for evento in eventos:
+                    ia_R = recompensas[evento]
+
+                tabela.atualizar_td(ia_S, ia_A, ia_R, make_state_int(jogo), alfa, gamma, jogo.game_over)
+
+            episodios.append((jogo.score, jogo.passos_episodio, causa_eventos(eventos),
+                              soma_epsilon/jogo.passos_episodio))
+            if len(episodios) == lote:
+                fila.put(episodios)
+                episodios = []
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fila.put(episodios)
+        fila.put(None)
+        tabela = None
+        compartilhada.fechar()
+#----------------------------------------------------------------------------------------#
+
+
+
+
+#-------------------------------------Coordenador----------------------------------------#
+# Lança n_processos trabalhadores sobre uma cópia compartilhada de tabela, passa cada
+# episódio deles por metricas.registrar (sem metricas, um Metricas só com o resumo na
+# tela) e, no fim, copia a tabela compartilhada de volta para tabela.
+# O trabalhador i recebe a semente numerada (HOGWILD, episode_count, i) de `semente`: um
+# resume do mesmo checkpoint repete as mesmas sementes, e cada trecho do treino tem as
+# suas. Os checkpoints guardam `semente` junto do episode_count para isso.
+# Devolve (episode_count, max_score).
+def treinar_hogwild(tabela, n_processos, episodes, recompensas, alfa=0.01, gamma=1.01, cte_epsilon=3,
+                    semente=None, episode_count=0, max_score=1, metricas=None,
+                    checkpointer=None, episodios_checkpoint=0, lote=100):
+    compartilhada = TabelaCompartilhada(valor_padrao=tabela.valor_padrao)
+    compartilhada.tabela.carregar_arrays(tabela.arrays())
+
+    if semente is None:
+        semente = np.random.SeedSequence().entropy
+    inicio = episode_count
+    proprias = metricas is None
+    if proprias:
+        metricas = Metricas()
+    restantes = episodes - episode_count
+    por_processo = [restantes//n_processos + (i < restantes % n_processos) for i in range(n_processos)]
+
+    contexto = mp.get_context("spawn")
+    fila = contexto.Queue()
+    parar = contexto.Event()
+    processos = []
+    for i in range(n_processos):
+        processo = contexto.Process(target=_trabalhador, daemon=True, args=(
+            compartilhada.nomes(), tabela.valor_padrao, recompensas, alfa, gamma, cte_epsilon,
+            semente_numerada(semente, HOGWILD, inicio, i), por_processo[i], fila, parar, lote))
+        processo.start()
+        processos.append(processo)
+
+    terminados = 0
+    try:
+        while terminados < n_processos:
+            try:
+                episodios = fila.get(timeout=1)
+            except queue.Empty:
+                if not any(processo.is_alive() for processo in processos):
+                    break
+                continue
+
+            if episodios is None:
+                terminados += 1
+                continue
+
+            for score, passos, causa, epsilon in episodios:
+                episode_count += 1
+                metricas.registrar(episode_count, score, passos, causa, epsilon)
+                if score > max_score:
+                    max_score = score
+
+                if checkpointer is not None and episodios_checkpoint and episode_count % episodios_checkpoint == 0:
+                    checkpointer.salvar(episode_count, compartilhada.tabela.arrays(), {
+                        "episode_count": episode_count,
+                        "max_score": max_score,
+                        "semente": semente,
+                    })
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Os trabalhadores só terminam depois que a fila deles foi lida
+        parar.set()
+        while terminados < n_processos:
+            try:
+                if fila.get(timeout=1) is None:
+                    terminados += 1
+            except queue.Empty:
+                if not any(processo.is_alive() for processo in processos):
+                    break
+        for processo in processos:
+            processo.join()
+        tabela.carregar_arrays(compartilhada.tabela.arrays())
+        compartilhada.fechar()
+        if proprias:
+            metricas.fechar()
+
+    return episode_count, max_score
+#----------------------------------------------------------------------------------------#
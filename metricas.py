@@ -0,0 +1,135 @@
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+from snake_vec_env import VIVO, PAREDE, CORPO, LIMITE, CHEIO
+
+
+
+#-----------------------------------Formato em disco-----------------------------------#
+# Um registro por episódio, todos do mesmo tamanho, um depois do outro, sem cabeçalho.
+# O arquivo só cresce, então quem lê (o painel, por exemplo) pode continuar de onde
+# parou com ler_metricas(caminho, inicio).
+REGISTRO = np.dtype([
+    ("episodio", np.int64),
+    ("score", np.int32),
+    ("passos", np.int32),
+    ("causa", np.uint8),     # VIVO, PAREDE, CORPO, LIMITE ou CHEIO do snake_vec_env, ou INTERROMPIDO
+    ("epsilon", np.float32), # epsilon médio das ações escolhidas pela tabela no episódio
+    ("tempo", np.float64),   # time.time() do fim do episódio
+])
+
+# Episódio cortado de fora (janela fechada), sem o jogo ter acabado. O SnakeVecEnv não
+# tem esse caso; o código vem depois dos dele.
+INTERROMPIDO = 5
+
+NOMES_CAUSAS = {VIVO: "vivo", PAREDE: "parede", CORPO: "corpo", LIMITE: "limite", CHEIO: "cheio",
+                INTERROMPIDO: "interrompido"}
+
+
+# Causa do fim do jogo a partir dos eventos do último passo, na mesma prioridade do
+# SnakeVecEnv: parede, corpo, tabuleiro cheio, limite. O tabuleiro cheio não tem evento
+# próprio: é o passo que comeu e acabou o jogo sem bater em nada. Jogo acabado sem
+# evento nenhum que acabe foi interrompido (game_over ligado por fora, janela fechada).
+def causa_eventos(eventos, game_over=True):
+    if not game_over:
+        return VIVO
+    if "parede" in eventos:
+        return PAREDE
+    if "corpo" in eventos:
+        return CORPO
+    if "comida" in eventos:
+        return CHEIO
+    if "limite" in eventos:
+        return LIMITE
+    return INTERROMPIDO
+
+
+# Registros do arquivo a partir do registro `inicio`. Um registro pela metade no fim
+# (sendo escrito agora) fica para a próxima leitura.
+def ler_metricas(caminho, inicio=0):
+    if not os.path.exists(caminho):
+        return np.zeros(0, dtype=REGISTRO)
+    with open(caminho, "rb") as arquivo:
+        arquivo.seek(inicio*REGISTRO.itemsize)
+        dados = arquivo.read()
+    n = len(dados)//REGISTRO.itemsize
+    return np.frombuffer(dados[:n*REGISTRO.itemsize], dtype=REGISTRO)
+#---------------------------------------------------------------------------------------#
+
+
+
+
+#-------------------------------------Coletor-------------------------------------------#
+# Substitui o print por episódio e as listas que cresciam sem limite:
+#   - cada episódio vira um registro num buffer de tamanho fixo, escrito no arquivo a
+#     cada `lote` episódios ou intervalo_escrita segundos (e no fechar), o que chegar antes;
+#   - na memória ficam só os últimos `janela` scores e os agregados (total, melhor);
+#   - o resumo vai para a tela no máximo uma vez a cada intervalo_print segundos.
+class Metricas:
+
+    def __init__(self, caminho=None, janela=1000, lote=1000, intervalo_print=1.0, intervalo_escrita=2.0):
+        self.caminho = caminho
+        self.intervalo_print = intervalo_print
+        self.intervalo_escrita = intervalo_escrita
+        self.buffer = np.zeros(lote, dtype=REGISTRO)
+        self.n_buffer = 0
+        self.janela = deque(maxlen=janela)
+        self.episodios = 0
+        self.melhor = 0
+        self.causas = np.zeros(len(NOMES_CAUSAS), dtype=np.int64)
+        self.ultimo_print = 0
+        self.ultima_escrita = time.time()
+        if caminho is not None and os.path.dirname(caminho):
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+
+
+    def registrar(self, episodio, score, passos, causa, epsilon=0.0):
+        agora = time.time()
+        self.buffer[self.n_buffer] = (episodio, score, passos, causa, epsilon, agora)
+        self.n_buffer += 1
+        if self.n_buffer == len(self.buffer) or agora - self.ultima_escrita >= self.intervalo_escrita:
+            self.escrever()
+
+        self.janela.append((episodio, score))
+        self.episodios += 1
+        self.causas[causa] += 1
+        if score > self.melhor:
+            self.melhor = score
+
+        if agora - self.ultimo_print >= self.intervalo_print:
+            self.ultimo_print = agora
+            print(self.resumo())
+
+
+    def escrever(self):
+        if self.caminho is not None and self.n_buffer > 0:
+            with open(self.caminho, "ab") as arquivo:
+                arquivo.write(self.buffer[:self.n_buffer].tobytes())
+        self.n_buffer = 0
+        self.ultima_escrita = time.time()
+
+
+    def scores(self):
+        return np.array([score for _, score in self.janela])
+
+
+    # Média e percentis dos scores da janela, melhor score e causas de fim de jogo
+    def resumo(self):
+        scores = self.scores()
+        p50, p90 = np.percentile(scores, [50, 90]) if len(scores) else (0, 0)
+        causas = "  ".join(NOMES_CAUSAS[c] + ":" + str(n) for c, n in enumerate(self.causas) if n)
+        return ("Episode : " + str(self.janela[-1][0] if self.janela else 0)
+                + "  Media :" + str(round(scores.mean(), 2) if len(scores) else 0)
+                + "  p50 :" + str(p50) + "  p90 :" + str(p90)
+                + "  Best Score :" + str(self.melhor) + "  " + causas)
+
+
+    # Escreve o que falta e imprime o último resumo
+    def fechar(self):
+        self.escrever()
+        if self.episodios:
+            print(self.resumo())
+#---------------------------------------------------------------------------------------#
@@ -0,0 +1,85 @@
+import numpy as np
+
+from snake_engine import ACOES
+
+
+
+#------------------------------------Retornos por passo------------------------------------#
+# G_t = r_t + gamma*G_{t+1}, de trás para frente, com floats do Python: sem divisão por
+# potências de gamma, vale para qualquer gamma (0 inclusive) e, num episódio de mil
+# passos, custa menos que as contas em blocos com o NumPy.
+def retornos_descontados(recompensas, gamma):
+    recompensas = recompensas.tolist()
+    retornos = [0.0]*len(recompensas)
+    seguinte = 0.0
+    for t in range(len(recompensas) - 1, -1, -1):
+        seguinte = recompensas[t] + gamma*seguinte
+        retornos[t] = seguinte
+    return np.array(retornos)
+
+
+# Índices da primeira ocorrência de cada (estado, ação), na ordem do episódio
+def primeiras_visitas(estados, acoes):
+    _, primeiras = np.unique(estados*len(ACOES) + acoes, return_index=True)
+    primeiras.sort()
+    return primeiras
+#-------------------------------------------------------------------------------------------#
+
+
+
+
+#------------------------------------Episódio do Monte Carlo--------------------------------#
+# Guarda estado, ação e recompensa de cada passo em arrays alocados uma vez (que dobram se
+# um episódio passar do tamanho) e, no fim do episódio, calcula o retorno de cada passo e
+# aplica todas as médias incrementais de uma vez com TabelaQ.atualizar_media_lote.
+# Com primeira_visita só a primeira ocorrência de cada (estado, ação) no episódio conta.
+class EpisodioMC:
+
+    def __init__(self, tabela, gamma=0.99, primeira_visita=False, capacidade=1024):
+        self.tabela = tabela
+        self.gamma = gamma
+        self.primeira_visita = primeira_visita
+        self.estados = np.zeros(capacidade, dtype=np.int64)
+        self.acoes = np.zeros(capacidade, dtype=np.int64)
+        self.recompensas = np.zeros(capacidade)
+        self.n = 0
+
+
+    def __len__(self):
+        return self.n
+
+
+    def iniciar(self):
+        self.n = 0
+
+
+    def registrar(self, estado, acao, recompensa):
+        if self.n == len(self.estados):
+            self.estados = np.concatenate([self.estados, np.zeros_like(self.estados)])
+            self.acoes = np.concatenate([self.acoes, np.zeros_like(self.acoes)])
+            self.recompensas = np.concatenate([self.recompensas, np.zeros_like(self.recompensas)])
+        self.estados[self.n] = estado
+        self.acoes[self.n] = acao
+        self.recompensas[self.n] = recompensa
+        self.n += 1
+
+
+    def retornos(self):
+        return retornos_descontados(self.recompensas[:self.n], self.gamma)
+
+
+    # Fim do episódio: atualiza a tabela e devolve o retorno do primeiro passo
+    def terminar(self):
+        if self.n == 0:
+            return 0.0
+        estados = self.estados[:self.n]
+        acoes = self.acoes[:self.n]
+        retornos = self.retornos()
+        if self.primeira_visita:
+            primeiras = primeiras_visitas(estados, acoes)
+            self.tabela.atualizar_media_lote(estados[primeiras], acoes[primeiras], retornos[primeiras])
+        else:
+            self.tabela.atualizar_media_lote(estados, acoes, retornos)
+        self.n = 0
+        return retornos[0]
+#-------------------------------------------------------------------------------------------#
@@ -0,0 +1,167 @@
+import multiprocessing as mp
+
+import numpy as np
+
+from aleatorio import Aleatorio, semente_numerada, TAREFAS_MC
+from snake_engine import SnakeGame, make_state_int, direcao_atual, ACOES
+from q_table import TabelaQ, acao_aleatoria
+from monte_carlo import retornos_descontados
+from metricas import Metricas, causa_eventos
+
+
+
+#------------------------------------Episódio de um trabalhador------------------------------------#
+# O mesmo episódio do Snake_game_Monte_carlo.py (energia, recompensa pela distância até a
+# comida e recompensas dos eventos), jogado com uma cópia congelada da tabela.
+# A exploração sai de rng, não do gerador do jogo, como no script.
+# Devolve os estados, as ações e a recompensa de cada passo, o score, a causa do fim e
+# o epsilon médio das escolhas da tabela.
+def jogar_episodio(jogo, tabela, recompensas, cte_epsilon, rng):
+    jogo.reset()
+    fuel = 10
+    dist = jogo.distancia2()
+    ia_R = []
+    estados = []
+    acoes = []
+    soma_epsilon = 0
+
+    while not jogo.game_over:
+        ia_S = make_state_int(jogo)
+        ia_A = tabela.choose_action(ia_S, direcao_atual(jogo), cte_epsilon, rng)
+        soma_epsilon += cte_epsilon/(cte_epsilon + tabela.N_S.item(ia_S))
+
+        # Se tem energia suficiente, usa o monte carlo, senão sorteia uma ação aleatória.
+        acao = ia_A
+        if (fuel <= 0):
+            acao = acao_aleatoria(jogo.direcao, rng)
+            fuel = 10
+
+        eventos = jogo.step_acao(acao)
+        fuel -= 0.0111
+
+        dist_atual = jogo.distancia2()
+        recompensa = (dist - dist_atual)*0.00001
+        for evento in eventos:
+            recompensa += recompensas[evento]
+            if evento == "comida":
+                fuel = 10
+        ia_R.append(recompensa)
+
+        estados.append(ia_S)
+        acoes.append(ia_A)
+        dist = dist_atual
+
+    return estados, acoes, ia_R, jogo.score, causa_eventos(eventos), soma_epsilon/len(estados)
+
+
+# Uma tarefa: n_episodios com a cópia da política recebida. Devolve as trajetórias de
+# forma compacta: estados em uint16 e ações em uint8, todas concatenadas, o retorno
+# descontado de cada passo, e o tamanho, o score, a causa do fim e o epsilon médio de
+# cada episódio.
+def _tarefa(arrays, valor_padrao, recompensas, cte_epsilon, gamma, n_episodios, semente):
+    tabela = TabelaQ(valor_padrao=valor_padrao, arrays=arrays)
+    jogo = SnakeGame(semente=semente)
+    rng = Aleatorio(jogo.rng.semente_filha())
+
+    todos_estados = []
+    todas_acoes = []
+    retornos = []
+    tamanhos = np.zeros(n_episodios, dtype=np.int32)
+    scores = np.zeros(n_episodios, dtype=np.int32)
+    causas = np.zeros(n_episodios, dtype=np.uint8)
+    epsilons = np.zeros(n_episodios, dtype=np.float32)
+    for i in range(n_episodios):
+        estados, acoes, ia_R, scores[i], causas[i], epsilons[i] = jogar_episodio(jogo, tabela, recompensas, cte_epsilon, rng)
+        tamanhos[i] = len(estados)
+        todos_estados.extend(estados)
+        todas_acoes.extend(acoes)
+        retornos.append(retornos_descontados(np.array(ia_R), gamma))
+
+    return (np.array(todos_estados, dtype=np.uint16), np.array(todas_acoes, dtype=np.uint8),
+            np.concatenate(retornos), tamanhos, scores, causas, epsilons)
+#---------------------------------------------------------------------------------------------------#
+
+
+
+
+#---------------------------------------------Aprendiz----------------------------------------------#
+# Junta as trajetórias de uma tarefa na tabela com a média incremental, tudo de uma vez,
+# cada passo com o seu retorno. Na primeira visita só a primeira ocorrência de cada
+# (estado, ação) de cada episódio conta; senão todas contam.
+def juntar_trajetorias(tabela, estados, acoes, retornos, tamanhos, primeira_visita=False):
+    estados = estados.astype(np.int64)
+    acoes = acoes.astype(np.int64)
+
+    if primeira_visita:
+        episodio = np.repeat(np.arange(len(tamanhos)), tamanhos)
+        chave = (episodio*len(tabela.N_S) + estados)*len(ACOES) + acoes
+        _, primeiras = np.unique(chave, return_index=True)
+        estados, acoes, retornos = estados[primeiras], acoes[primeiras], retornos[primeiras]
+
+    tabela.atualizar_media_lote(estados, acoes, retornos)
+
+
+# Mantém n_processos trabalhadores jogando; cada tarefa leva a política do momento em que
+# foi enviada, então a cópia usada pelos trabalhadores é atualizada a cada tarefa.
+# Cada episódio passa por metricas.registrar (sem metricas, um Metricas só com o resumo
+# na tela).
+# A tarefa que começa no episódio e recebe a semente numerada (TAREFAS_MC, e) de
+# `semente`: um resume do mesmo checkpoint manda as mesmas sementes de novo. Os checkpoints guardam `semente`
+# junto do episode_count para isso.
+# Devolve (episode_count, max_score).
+def treinar_mc_paralelo(tabela, n_processos, episodes, recompensas, cte_epsilon=40, primeira_visita=False,
+                        gamma=0.99, episodios_por_tarefa=50, semente=None, episode_count=0, max_score=1,
+                        metricas=None, checkpointer=None, episodios_checkpoint=0):
+    if semente is None:
+        semente = np.random.SeedSequence().entropy
+    proprias = metricas is None
+    if proprias:
+        metricas = Metricas()
+
+    contexto = mp.get_context("spawn")
+    pool = contexto.Pool(n_processos)
+    pendentes = []
+    enviados = episode_count
+
+    def enviar():
+        nonlocal enviados
+        n = min(episodios_por_tarefa, episodes - enviados)
+        if n <= 0:
+            return
+        arrays = {chave: array.copy() for chave, array in tabela.arrays().items()}
+        semente_tarefa = semente_numerada(semente, TAREFAS_MC, enviados)
+        pendentes.append(pool.apply_async(_tarefa, (arrays, tabela.valor_padrao, recompensas, cte_epsilon, gamma, n, semente_tarefa)))
+        enviados += n
+
+    try:
+        # Duas tarefas por trabalhador, para ninguém ficar parado enquanto o aprendiz junta
+        for _ in range(2*n_processos):
+            enviar()
+
+        while pendentes:
+            estados, acoes, retornos, tamanhos, scores, causas, epsilons = pendentes.pop(0).get()
+            juntar_trajetorias(tabela, estados, acoes, retornos, tamanhos, primeira_visita)
+            enviar()
+
+            for score, passos, causa, epsilon in zip(scores.tolist(), tamanhos.tolist(), causas.tolist(), epsilons.tolist()):
+                episode_count += 1
+                metricas.registrar(episode_count, score, passos, causa, epsilon)
+                if score > max_score:
+                    max_score = score
+
+                if checkpointer is not None and episodios_checkpoint and episode_count % episodios_checkpoint == 0:
+                    checkpointer.salvar(episode_count, tabela.arrays(), {
+                        "episode_count": episode_count,
+                        "max_score": max_score,
+                        "semente": semente,
+                    })
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.terminate()
+        pool.join()
+        if proprias:
+            metricas.fechar()
+
+    return episode_count, max_score
+#---------------------------------------------------------------------------------------------------#
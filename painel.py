@@ -0,0 +1,129 @@
+import argparse
+import subprocess
+import sys
+
+import numpy as np
+
+from metricas import ler_metricas
+
+
+
+#-------------------------------Curvas resumidas em baldes------------------------------#
+# Guarda no máximo n_max baldes de episódios seguidos com o mínimo, o máximo, a soma e a
+# quantidade de scores de cada um, mais a hora do primeiro e do último episódio. Quando os baldes
+# acabam, cada par vizinho vira um só e a largura dobra, então a memória e o tempo de
+# desenhar não dependem de quantos milhões de episódios já passaram.
+class Baldes:
+
+    def __init__(self, n_max=512):
+        self.n_max = n_max - n_max % 2
+        self.largura = 1
+        self.total = 0
+        self.episodio = np.zeros(self.n_max, dtype=np.int64)
+        self.minimo = np.zeros(self.n_max, dtype=np.int64)
+        self.maximo = np.zeros(self.n_max, dtype=np.int64)
+        self.soma = np.zeros(self.n_max)
+        self.n = np.zeros(self.n_max, dtype=np.int64)
+        self.tempo_inicio = np.zeros(self.n_max)
+        self.tempo_fim = np.zeros(self.n_max)
+
+
+    def usados(self):
+        return -(-self.total//self.largura)
+
+
+    def _juntar_pares(self):
+        metade = self.n_max//2
+        self.episodio[:metade] = self.episodio[0::2]
+        self.minimo[:metade] = np.minimum(self.minimo[0::2], np.where(self.n[1::2] > 0, self.minimo[1::2], self.minimo[0::2]))
+        self.maximo[:metade] = np.maximum(self.maximo[0::2], self.maximo[1::2])
+        self.soma[:metade] = self.soma[0::2] + self.soma[1::2]
+        self.tempo_inicio[:metade] = self.tempo_inicio[0::2]
+        self.tempo_fim[:metade] = np.maximum(self.tempo_fim[0::2], self.tempo_fim[1::2])
+        self.n[:metade] = self.n[0::2] + self.n[1::2]
+        for array in (self.episodio, self.minimo, self.maximo, self.soma, self.n, self.tempo_inicio, self.tempo_fim):
+            array[metade:] = 0
+        self.largura *= 2
+
+
+    def adicionar(self, registros):
+        if len(registros) == 0:
+            return
+        while (self.total + len(registros) - 1)//self.largura >= self.n_max:
+            self._juntar_pares()
+
+        baldes = (self.total + np.arange(len(registros)))//self.largura
+        novos = self.n[baldes] == 0
+        primeiros = np.unique(baldes[novos], return_index=True)[1]
+        indices = baldes[novos][primeiros]
+        self.episodio[indices] = registros["episodio"][novos][primeiros]
+        self.minimo[indices] = registros["score"][novos][primeiros]
+        self.tempo_inicio[indices] = registros["tempo"][novos][primeiros]
+
+        np.minimum.at(self.minimo, baldes, registros["score"])
+        np.maximum.at(self.maximo, baldes, registros["score"])
+        np.add.at(self.soma, baldes, registros["score"])
+        np.add.at(self.n, baldes, 1)
+        np.maximum.at(self.tempo_fim, baldes, registros["tempo"])
+        self.total += len(registros)
+
+
+    # Episódios por segundo de cada balde, contando do fim do balde anterior
+    def vazao(self):
+        usados = self.usados()
+        anterior = np.concatenate([self.tempo_inicio[:1], self.tempo_fim[:usados - 1]])
+        duracao = self.tempo_fim[:usados] - anterior
+        return np.where(duracao > 0, self.n[:usados]/np.maximum(duracao, 1e-9), np.nan)
+#----------------------------------------------------------------------------------------#
+
+
+
+
+#------------------------------------Janela do painel------------------------------------#
+# Lê só os registros novos do arquivo de métricas a cada `intervalo` segundos e redesenha.
+# Roda num processo separado, então o treino nunca espera a janela.
+def mostrar_painel(caminho, intervalo=1.0, n_baldes=512):
+    import matplotlib.pyplot as plt
+    from matplotlib.animation import FuncAnimation
+
+    baldes = Baldes(n_baldes)
+    figura, (eixo_score, eixo_vazao) = plt.subplots(2, 1, sharex=True)
+    figura.canvas.manager.set_window_title(caminho)
+
+    def atualizar(_):
+        novos = ler_metricas(caminho, baldes.total)
+        if len(novos) == 0:
+            return
+        baldes.adicionar(novos)
+
+        usados = baldes.usados()
+        episodios = baldes.episodio[:usados]
+        eixo_score.clear()
+        eixo_score.fill_between(episodios, baldes.minimo[:usados], baldes.maximo[:usados], color='b', alpha=0.2, step='post')
+        eixo_score.plot(episodios, baldes.soma[:usados]/baldes.n[:usados], 'b-')
+        eixo_score.set_ylabel("Scores")
+        eixo_score.set_title(str(baldes.total) + " episodes, " + str(baldes.largura) + " por ponto")
+
+        eixo_vazao.clear()
+        eixo_vazao.plot(episodios, baldes.vazao(), 'g-')
+        eixo_vazao.set_ylabel("Episodes/s")
+        eixo_vazao.set_xlabel("Episodes")
+
+    animacao = FuncAnimation(figura, atualizar, interval=intervalo*1000, cache_frame_data=False)
+    plt.show()
+    return animacao
+
+
+# Abre o painel num processo novo e devolve o Popen, sem esperar nada
+def abrir_painel(caminho, intervalo=1.0):
+    return subprocess.Popen([sys.executable, __file__, caminho, "--intervalo", str(intervalo)])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Painel com as curvas de um arquivo de métricas do treino")
+    parser.add_argument("caminho", nargs="?", default="metricas/q_learning.bin")
+    parser.add_argument("--intervalo", type=float, default=1.0, help="segundos entre leituras do arquivo")
+    parser.add_argument("--baldes", type=int, default=512, help="pontos de cada curva")
+    args = parser.parse_args()
+    mostrar_painel(args.caminho, args.intervalo, args.baldes)
+#----------------------------------------------------------------------------------------#
@@ -0,0 +1,132 @@
+from collections import deque
+
+import numpy as np
+
+from snake_engine import ACOES
+
+
+
+#-------------------------------------Q de n passos-------------------------------------#
+# Em vez de olhar só um passo à frente, cada par (estado, ação) espera n passos e é
+# atualizado com as n recompensas seguintes mais gamma**n vezes o melhor Q de onde o
+# jogo chegou, então a comida chega n estados para trás de uma vez.
+#
+# O alvo só vale para a política gulosa: quando uma ação exploratória é tomada, os
+# pares que ainda esperavam são atualizados ali mesmo, com o melhor Q do estado em que
+# a exploração aconteceu, como no Q(lambda) de Watkins.
+class QNPassos:
+
+    def __init__(self, tabela, n=4, alfa=0.01, gamma=1.01):
+        self.tabela = tabela
+        self.n = n
+        self.alfa = alfa
+        self.gamma = gamma
+        self.pendentes = deque()
+
+
+    # Atualiza os pares pendentes com as recompensas que eles viram e mais `cauda`
+    def _fechar(self, quantos, cauda):
+        Q = self.tabela.Q
+        recompensas = [r for _, _, r in self.pendentes]
+        for k in range(quantos):
+            estado, acao, _ = self.pendentes.popleft()
+            G = cauda
+            for r in reversed(recompensas[k:]):
+                G = r + self.gamma*G
+            Q[estado, acao] += self.alfa*(G - Q[estado, acao])
+
+
+    # Um passo: estado, ação tomada (explorou diz se foi exploratória), recompensa,
+    # estado seguinte e se o jogo acabou
+    def aprender(self, estado, acao, recompensa, estado_, fim, explorou=False):
+        tabela = self.tabela
+        tabela.N_S[estado] += 1
+        tabela.N_S_A[estado, acao] += 1
+
+        if explorou and self.pendentes:
+            self._fechar(len(self.pendentes), tabela.Q[estado].max())
+
+        self.pendentes.append((estado, acao, recompensa))
+        if fim:
+            self._fechar(len(self.pendentes), 0.0)
+        elif len(self.pendentes) == self.n:
+            self._fechar(1, tabela.Q[estado_].max())
+
+
+    # Descarta o que estava pendente (episódio interrompido)
+    def reiniciar(self):
+        self.pendentes.clear()
+#----------------------------------------------------------------------------------------#
+
+
+
+
+#--------------------------------Q(lambda) de Watkins-----------------------------------#
+# Cada passo gera o erro TD delta = R + gamma*max Q(S_) - Q(S, A), aplicado a todos os
+# pares recentes na proporção do traço de cada um: o par atual fica com traço 1
+# (traço substituto) e os anteriores caem gamma*lambda por passo. Os traços são
+# cortados quando uma ação exploratória é tomada e no fim do episódio.
+#
+# Só os pares com traço acima de traco_minimo ficam guardados (no máximo max_tracos,
+# os mais recentes), em arrays pequenos, então o custo por passo não depende do
+# tamanho da tabela nem do episódio.
+class QLambda:
+
+    def __init__(self, tabela, lambda_=0.9, alfa=0.01, gamma=1.01, traco_minimo=0.01, max_tracos=64):
+        self.tabela = tabela
+        self.decaimento = gamma*lambda_
+        self.alfa = alfa
+        self.gamma = gamma
+        self.traco_minimo = traco_minimo
+        self.indices = np.zeros(max_tracos, dtype=np.int64)   # estado*len(ACOES) + ação
+        self.tracos = np.zeros(max_tracos)
+        self.n = 0
+
+
+    def aprender(self, estado, acao, recompensa, estado_, fim, explorou=False):
+        tabela = self.tabela
+        Q = tabela.Q
+        tabela.N_S[estado] += 1
+        tabela.N_S_A[estado, acao] += 1
+
+        if explorou:
+            self.n = 0
+
+        alvo = recompensa if fim else recompensa + self.gamma*Q[estado_].max()
+        delta = alvo - Q[estado, acao]
+
+        # O par atual vai para o fim com traço 1, saindo de onde estava se já tinha traço;
+        # se não couber, o mais antigo sai
+        indice = estado*len(ACOES) + acao
+        n = self.n
+        indices, tracos = self.indices, self.tracos
+        manter = indices[:n] != indice
+        if not manter.all() or n == len(indices):
+            if n == len(indices):
+                manter[0] = False
+            n = np.count_nonzero(manter)
+            indices[:n] = indices[:self.n][manter]
+            tracos[:n] = tracos[:self.n][manter]
+        indices[n] = indice
+        tracos[n] = 1.0
+        n += 1
+
+        Q.reshape(-1)[indices[:n]] += self.alfa*delta*tracos[:n]
+
+        if fim:
+            self.n = 0
+            return
+
+        tracos[:n] *= self.decaimento
+        # Os traços só caem, e os mais antigos são os menores
+        self.n = n
+        primeiro = np.searchsorted(tracos[:n] >= self.traco_minimo, True)
+        if primeiro:
+            self.n = n - primeiro
+            indices[:self.n] = indices[primeiro:n]
+            tracos[:self.n] = tracos[primeiro:n]
+
+
+    def reiniciar(self):
+        self.n = 0
+#----------------------------------------------------------------------------------------#
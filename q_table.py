@@ -0,0 +1,195 @@
+import math
+import random
+
+import numpy as np
+
+from snake_engine import ACOES, PARADA, CONTRARIA, N_ESTADOS, INDICE_ACAO, str_to_state
+
+
+
+#------------------------------Máscara do sentido contrário------------------------------#
+# PERMITIDAS[direcao] diz quais ações não voltam por cima do pescoço.
+# A linha PARADA (antes do primeiro movimento) permite todas.
+CONTRARIO = np.array(CONTRARIA[:PARADA])
+PERMITIDAS = np.ones((PARADA + 1, len(ACOES)), dtype=bool)
+PERMITIDAS[np.arange(PARADA), CONTRARIO] = False
+
+# Para sortear uma ação permitida com um único número aleatório:
+# ALTERNATIVAS[direcao, :N_ALTERNATIVAS[direcao]] são as ações permitidas.
+ALTERNATIVAS = np.array([np.flatnonzero(linha).tolist() + [0]*(len(ACOES) - linha.sum()) for linha in PERMITIDAS])
+N_ALTERNATIVAS = PERMITIDAS.sum(axis=1)
+
+# As mesmas tabelas em listas, para o caso de um jogo só sem passar pelo NumPy
+_ALTERNATIVAS = ALTERNATIVAS.tolist()
+_N_ALTERNATIVAS = N_ALTERNATIVAS.tolist()
+
+
+# Uma ação permitida qualquer, com um só número de rng (o módulo random ou o
+# Aleatorio do jogo), sem sortear de novo quando sai o sentido contrário
+def acao_aleatoria(direcao, rng=random):
+    return _ALTERNATIVAS[direcao][int(rng.random()*_N_ALTERNATIVAS[direcao])]
+#----------------------------------------------------------------------------------------#
+
+
+
+
+#---------------------------------Tabela Q densa-----------------------------------------#
+# Substitui os dicts ia_Q, ia_N_S_A e ia_N_S por arrays indexados pelo estado inteiro
+# (make_state_int) e pelo índice da ação em ACOES.
+#
+# Ações nunca visitadas valem valor_padrao na hora de escolher (0 no Monte Carlo,
+# infinito no Q-learning), como o .get(a, ...) do choose_action antigo. No alvo do
+# TD elas valem 0, como no laço antigo.
+#
+# Um jogo só (um estado inteiro por vez) não passa pelo NumPy: a linha de 4 valores vira
+# lista e a conta é feita com floats do Python, que numa linha tão curta custa bem menos
+# que where/argmax. O NumPy fica para os lotes (choose_actions e as atualizações em lote).
+class TabelaQ:
+
+    # arrays permite usar arrays já existentes (memória compartilhada, mmap) em vez
+    # de criar novos
+    def __init__(self, n_estados=N_ESTADOS, valor_padrao=0.0, arrays=None):
+        self.valor_padrao = valor_padrao
+        if arrays is None:
+            arrays = {
+                "Q": np.zeros((n_estados, len(ACOES))),
+                "N_S_A": np.zeros((n_estados, len(ACOES)), dtype=np.int64),
+                "N_S": np.zeros(n_estados, dtype=np.int64),
+            }
+        self.Q = arrays["Q"]
+        self.N_S_A = arrays["N_S_A"]
+        self.N_S = arrays["N_S"]
+
+
+    def valores(self, estados):
+        return np.where(self.N_S_A[estados] == 0, self.valor_padrao, self.Q[estados])
+
+
+    # Melhor ação permitida. Empates ficam com a última ação de ACOES, como o >= do
+    # choose_action antigo. Funciona para um estado ou para um array de estados.
+    def melhor_acao(self, estados, direcoes):
+        if isinstance(estados, int):
+            return self._melhor_acao(estados, direcoes)
+        valores = np.where(PERMITIDAS[direcoes], self.valores(estados), -np.inf)
+        return len(ACOES) - 1 - np.argmax(valores[..., ::-1], axis=-1)
+
+
+    # melhor_acao de um estado só, em Python
+    def _melhor_acao(self, estado, direcao):
+        q = self.Q[estado].tolist()
+        n = self.N_S_A[estado].tolist()
+        padrao = self.valor_padrao
+        melhor = -math.inf
+        escolhida = 0
+        for acao in _ALTERNATIVAS[direcao][:_N_ALTERNATIVAS[direcao]]:
+            valor = q[acao] if n[acao] else padrao
+            if valor >= melhor:
+                melhor = valor
+                escolhida = acao
+        return escolhida
+
+
+    # epsilon-guloso de um jogo só, como o choose_action antigo com dicts. Os
+    # sorteios saem de rng (o gerador da exploração nos scripts; o módulo random se nada for passado).
+    def choose_action(self, estado, direcao, cte_epsilon=3, rng=random):
+        epsilon = cte_epsilon/(cte_epsilon + self.N_S.item(estado))
+        if rng.random() <= epsilon:
+            return acao_aleatoria(direcao, rng)
+        return self._melhor_acao(estado, direcao)
+
+
+    # O mesmo sorteio do choose_action, devolvendo também se a ação saiu da exploração e
+    # não é a gulosa (o que corta os traços do Q(lambda) de Watkins)
+    def escolher(self, estado, direcao, cte_epsilon=3, rng=random):
+        epsilon = cte_epsilon/(cte_epsilon + self.N_S.item(estado))
+        if rng.random() <= epsilon:
+            acao = acao_aleatoria(direcao, rng)
+            return acao, acao != self._melhor_acao(estado, direcao)
+        return self._melhor_acao(estado, direcao), False
+
+
+    # epsilon-guloso de vários jogos ao mesmo tempo
+    def choose_actions(self, estados, direcoes, cte_epsilon=3, rng=np.random):
+        epsilon = cte_epsilon/(cte_epsilon + self.N_S[estados])
+        explorar = rng.random(len(estados)) <= epsilon
+        aleatorias = ALTERNATIVAS[direcoes, (rng.random(len(estados))*N_ALTERNATIVAS[direcoes]).astype(np.int64)]
+        return np.where(explorar, aleatorias, self.melhor_acao(estados, direcoes))
+
+
+    # Atualização do Q-learning: Q += alfa*(R + gamma*max Q(S_) - Q). No passo que termina
+    # o jogo (fim) o alvo é só R, como no replay, no Q de n passos e no Q(lambda).
+    def atualizar_td(self, estado, acao, recompensa, estado_, alfa=0.01, gamma=1.01, fim=False):
+        self.N_S[estado] += 1
+        self.N_S_A[estado, acao] += 1
+        alvo = recompensa if fim else recompensa + gamma*max(self.Q[estado_].tolist())
+        q = self.Q.item(estado, acao)
+        self.Q[estado, acao] = q + alfa*(alvo - q)
+
+
+    # A mesma atualização TD para um lote de transições de uma vez (replay). Os alvos usam
+    # o Q de antes do lote e transições repetidas somam as suas correções. Transições que
+    # terminaram o jogo (fins) não olham o Q do estado seguinte. As contagens de visita
+    # não mudam: elas contam passos jogados, não revisões.
+    def atualizar_td_lote(self, estados, acoes, recompensas, estados_, fins, alfa=0.01, gamma=1.01):
+        alvos = recompensas + np.where(fins, 0.0, gamma*self.Q[estados_].max(axis=1))
+        np.add.at(self.Q, (estados, acoes), alfa*(alvos - self.Q[estados, acoes]))
+
+
+    # Média incremental do Monte Carlo: Q += (G - Q)/N(S, A)
+    def atualizar_media(self, estado, acao, retorno):
+        self.N_S[estado] += 1
+        self.N_S_A[estado, acao] += 1
+        self.Q[estado, acao] += (retorno - self.Q[estado, acao])/self.N_S_A[estado, acao]
+
+
+    # A mesma média incremental para um lote inteiro de pares (estado, ação) de uma vez.
+    # Pares repetidos no lote dão o mesmo resultado que atualizar_media chamada em sequência,
+    # já que a média incremental é só a média de todos os retornos vistos.
+    # Só os pares do lote são tocados, então um episódio curto custa pouco.
+    def atualizar_media_lote(self, estados, acoes, retornos):
+        vistos, inverso, contagem = np.unique(estados*len(ACOES) + acoes, return_inverse=True, return_counts=True)
+        soma = np.bincount(inverso, weights=retornos, minlength=len(vistos))
+
+        Q = self.Q.reshape(-1)
+        N_S_A = self.N_S_A.reshape(-1)
+        N_S_A[vistos] += contagem
+        Q[vistos] += (soma - contagem*Q[vistos])/N_S_A[vistos]
+        np.add.at(self.N_S, estados, 1)
+
+
+    # Arrays para checkpoint e volta
+    def arrays(self):
+        return {"Q": self.Q, "N_S_A": self.N_S_A, "N_S": self.N_S}
+
+
+    def carregar_arrays(self, arrays):
+        self.Q[:] = arrays["Q"]
+        self.N_S_A[:] = arrays["N_S_A"]
+        self.N_S[:] = arrays["N_S"]
+
+
+    # Carrega as tabelas antigas em dicts (estados em string ou inteiros)
+    @classmethod
+    def de_dicts(cls, ia_Q, ia_N_S_A, ia_N_S, valor_padrao=0.0):
+        tabela = cls(valor_padrao=valor_padrao)
+        for s, acoes in ia_Q.items():
+            estado = str_to_state(s) if isinstance(s, str) else s
+            for a, valor in acoes.items():
+                tabela.Q[estado, INDICE_ACAO[a]] = valor
+                tabela.N_S_A[estado, INDICE_ACAO[a]] = ia_N_S_A.get(s, {}).get(a, 1)
+            tabela.N_S[estado] = ia_N_S.get(s, 0)
+        return tabela
+
+
+    def para_dicts(self):
+        ia_Q, ia_N_S_A, ia_N_S = {}, {}, {}
+        for estado in np.flatnonzero(self.N_S):
+            estado = int(estado)
+            ia_N_S[estado] = int(self.N_S[estado])
+            ia_Q[estado] = {}
+            ia_N_S_A[estado] = {}
+            for acao in np.flatnonzero(self.N_S_A[estado]):
+                ia_Q[estado][ACOES[acao]] = float(self.Q[estado, acao])
+                ia_N_S_A[estado][ACOES[acao]] = int(self.N_S_A[estado, acao])
+        return ia_Q, ia_N_S_A, ia_N_S
+#----------------------------------------------------------------------------------------#
@@ -0,0 +1,50 @@
+import numpy as np
+
+
+
+#---------------------------------Memória de replay---------------------------------#
+# As últimas `capacidade` transições (estado, ação, recompensa, estado seguinte, fim) em
+# arrays alocados uma vez; quando enche, a mais antiga é sobrescrita. Os estados cabem
+# em uint16 (12 bits) e as ações em uint8.
+class MemoriaReplay:
+
+    def __init__(self, capacidade=100000, semente=None):
+        self.estados = np.zeros(capacidade, dtype=np.uint16)
+        self.acoes = np.zeros(capacidade, dtype=np.uint8)
+        self.recompensas = np.zeros(capacidade)
+        self.estados_ = np.zeros(capacidade, dtype=np.uint16)
+        self.fins = np.zeros(capacidade, dtype=bool)
+        self.proxima = 0
+        self.n = 0
+        self.rng = np.random.default_rng(semente)
+
+
+    def __len__(self):
+        return self.n
+
+
+    def guardar(self, estado, acao, recompensa, estado_, fim):
+        i = self.proxima
+        self.estados[i] = estado
+        self.acoes[i] = acao
+        self.recompensas[i] = recompensa
+        self.estados_[i] = estado_
+        self.fins[i] = fim
+        self.proxima = (i + 1) % len(self.estados)
+        if self.n < len(self.estados):
+            self.n += 1
+
+
+    # Um lote de `tamanho` transições sorteadas com reposição:
+    # (estados, acoes, recompensas, estados_, fins), prontos para TabelaQ.atualizar_td_lote
+    def amostrar(self, tamanho):
+        i = self.rng.integers(0, self.n, tamanho)
+        return (self.estados[i].astype(np.int64), self.acoes[i].astype(np.int64), self.recompensas[i],
+                self.estados_[i].astype(np.int64), self.fins[i])
+
+
+    # Roda `atualizacoes` lotes de TD sobre a tabela, cada lote numa operação só
+    def revisar(self, tabela, atualizacoes, tamanho, alfa=0.01, gamma=1.01):
+        for _ in range(atualizacoes):
+            tabela.atualizar_td_lote(*self.amostrar(tamanho), alfa, gamma)
+#-------------------------------------------------------------------------------------#
@@ -1,16 +1,14 @@
-import pygame
 import time
 import random
 
-pygame.init()
+from snake_render import carregar_pygame
+
+# O pygame só é carregado quando o script é executado
+pygame = None
 
 game_screen_width = 600
 game_screen_height = 600
 
-game_screen = pygame.display.set_mode((game_screen_width, game_screen_height))
-
-pygame.display.update()
-
 game_over = False
 
 blue = (0,0,255)
@@ -42,7 +40,6 @@ snake_block = 20
 
 snake_grid_scale = 20.0
 
-clock = pygame.time.Clock()
 snake_list = []
 length_of_snake = 1
 
@@ -224,94 +221,100 @@ def get_action_vector(ia_action):
     print(ia_action, xc, yc)
     return [xc, yc]
 
-episode_count = 0
-episodes = 1
-ia_Q = {}
-while episode_count < episodes: # Episódios
-    game_over = False
-    food_x = 300
-    food_y = 300
-    score = 0
-    snake_x = snake_initial_x
-    snake_y = snake_initial_y
-    snake_y_change = 0
-    snake_x_change = 0
-    snake_list = []
-    length_of_snake = 1
-
-    ia_S = make_state()
-    ia_R = 0
-
-    while not game_over: # Um jogo - um episódio
-        for event in pygame.event.get():
-            if event.type==pygame.QUIT:
-                game_over=True
-                break
-
-        # Trocar isso pelo vetor retornado por choose_action, depois que ela tiver sido implementada.
-        ia_A = choose_action(ia_S)
+if __name__ == "__main__":
+    pygame = carregar_pygame()
+    game_screen = pygame.display.set_mode((game_screen_width, game_screen_height))
+    pygame.display.update()
+    clock = pygame.time.Clock()
+
+    episode_count = 0
+    episodes = 1
+    ia_Q = {}
+    while episode_count < episodes: # Episódios
+        game_over = False
+        food_x = 300
+        food_y = 300
+        score = 0
+        snake_x = snake_initial_x
+        snake_y = snake_initial_y
+        snake_y_change = 0
+        snake_x_change = 0
+        snake_list = []
+        length_of_snake = 1
+
+        ia_S = make_state()
+        ia_R = 0
+
+        while not game_over: # Um jogo - um episódio
+            for event in pygame.event.get():
+                if event.type==pygame.QUIT:
+                    game_over=True
+                    break
+
+            # Trocar isso pelo vetor retornado por choose_action, depois que ela tiver sido implementada.
+            ia_A = choose_action(ia_S)
 
 ############# "take action" #####################
 
-        vector_change = get_action_vector(ia_A)
-        snake_x_change = vector_change[0]
-        snake_y_change = vector_change[1]
+            vector_change = get_action_vector(ia_A)
+            snake_x_change = vector_change[0]
+            snake_y_change = vector_change[1]
 
-        if snake_x >= game_screen_width or snake_x < 0 or snake_y >= game_screen_height or snake_y < 0:
-            game_over = True
-            print("Perdeu")
-            ia_R = -10
+            if snake_x >= game_screen_width or snake_x < 0 or snake_y >= game_screen_height or snake_y < 0:
+                game_over = True
+                print("Perdeu")
+                ia_R = -10
 
-        if snake_x == food_x and snake_y == food_y:
-            food_x = round(random.randrange(0, game_screen_width - snake_block) / snake_grid_scale) * snake_grid_scale
-            food_y = round(random.randrange(0, game_screen_height - snake_block) / snake_grid_scale) * snake_grid_scale
-            length_of_snake += 1
-            ia_R = +10
+            if snake_x == food_x and snake_y == food_y:
+                food_x = round(random.randrange(0, game_screen_width - snake_block) / snake_grid_scale) * snake_grid_scale
+                food_y = round(random.randrange(0, game_screen_height - snake_block) / snake_grid_scale) * snake_grid_scale
+                length_of_snake += 1
+                ia_R = +10
 
-        snake_x = snake_x + snake_x_change
-        snake_y = snake_y + snake_y_change
+            snake_x = snake_x + snake_x_change
+            snake_y = snake_y + snake_y_change
 
-        snake_position_and_size = [snake_x, snake_y, snake_initial_width, snake_initial_height]
+            snake_position_and_size = [snake_x, snake_y, snake_initial_width, snake_initial_height]
 
-        game_screen.fill(black)
+            game_screen.fill(black)
 
-        snake_head = []
-        snake_head.append(snake_x)
-        snake_head.append(snake_y)
-        snake_list.append(snake_head)
+            snake_head = []
+            snake_head.append(snake_x)
+            snake_head.append(snake_y)
+            snake_list.append(snake_head)
 
-        if len(snake_list) > length_of_snake:
-            del snake_list[0]
+            if len(snake_list) > length_of_snake:
+                del snake_list[0]
 
-        for x in snake_list[:-1]:
-            if x == snake_head:
-                game_over = True
-                print("Perdeu")
+            for x in snake_list[:-1]:
+                if x == snake_head:
+                    game_over = True
+                    print("Perdeu")
 
-        snake_parts_drawn = 0
-        for x in snake_list:
-            if snake_parts_drawn == length_of_snake -1:
-                pygame.draw.rect(game_screen, white, [x[0], x[1], snake_block, snake_block])
-            else:
-                pygame.draw.rect(game_screen, blue, [x[0], x[1], snake_block, snake_block])
+            snake_parts_drawn = 0
+            for x in snake_list:
+                if snake_parts_drawn == length_of_snake -1:
+                    pygame.draw.rect(game_screen, white, [x[0], x[1], snake_block, snake_block])
+                else:
+                    pygame.draw.rect(game_screen, blue, [x[0], x[1], snake_block, snake_block])
 
-            snake_parts_drawn += 1
+                snake_parts_drawn += 1
 
-        score = length_of_snake - 1
-        print("Pontos = ", score, "episódio = ", episode_count)
+            score = length_of_snake - 1
+            print("Pontos = ", score, "episódio = ", episode_count)
 
-        pygame.draw.rect(game_screen, red, [food_x, food_y, food_width, food_height])
-        pygame.display.update()
+            pygame.draw.rect(game_screen, red, [food_x, food_y, food_width, food_height])
+            pygame.display.update()
 
 ############# acaba "take action" #####################
 
-        ia_S_ = make_state()
-        ia_A_ = choose_action(ia_S_)
-        # FALTANDO: Atualizar ia_Q
-        ia_S = ia_S_
-        ia_A = ia_A_
+            ia_S_ = make_state()
+            ia_A_ = choose_action(ia_S_)
+            # FALTANDO: Atualizar ia_Q
+            ia_S = ia_S_
+            ia_A = ia_A_
 
-        clock.tick(snake_speed)
+            clock.tick(snake_speed)
 
-    print("Fim do episódio ", episode_count)
-    episode_count += 1
+        print("Fim do episódio ", episode_count)
+        episode_count += 1
@@ -0,0 +1,570 @@
+import random
+from array import array
+from collections import deque
+
+from aleatorio import Aleatorio
+
+
+
+#-------------------------------Dimensões----------------------------------#
+# Tamanho padrão do tabuleiro em células. Qualquer outro tamanho pode ser passado
+# para SnakeGame(largura, altura); a tela tem snake_block pixels por célula.
+LARGURA = 30
+ALTURA = 30
+snake_block = 20
+
+# Tamanho da tela do tabuleiro padrão, em pixels
+game_screen_weight = LARGURA*snake_block
+game_screen_width = ALTURA*snake_block
+
+# Ações possíveis; o índice de cada uma é a ação de step_acao e da TabelaQ
+ACOES = ["UP", "DOWN", "RIGHT", "LEFT"]
+INDICE_ACAO = {a: i for i, a in enumerate(ACOES)}
+
+# Direção atual como índice de ACOES; PARADA antes do primeiro movimento
+PARADA = 4
+#--------------------------------------------------------------------------#
+
+
+
+
+#----------------------------------Tabuleiro-------------------------------#
+# O jogo trabalha com índices inteiros de célula; pixels só aparecem na hora de
+# desenhar. As células são numeradas numa grade com MARGEM células a mais em cada
+# borda, para que a cabeça que acabou de sair do tabuleiro (jogo perdido na parede)
+# e os vizinhos dela ainda tenham índice e o estado final possa ser calculado.
+#
+# O vizinho de c na direção ACOES[a] é c + deslocamentos[a]. A cabeça nunca passa de
+# uma célula além da parede, então os vizinhos dela ainda estão dentro da margem.
+#
+# Tabelas montadas uma vez por tamanho de tabuleiro, em array e bytearray (um ou
+# poucos bytes por célula, para tabuleiros de milhares de células de lado):
+#   fora[c]      -> c está fora do tabuleiro (parede)
+#   paredes[c]   -> bits DANGER_* das paredes vistas de c, com a mesma regra do estado
+#                   antigo: perigo à esquerda já na coluna 1, à direita na última, etc.
+#   x[c], y[c]   -> coluna e linha de c (-MARGEM .. largura-1+MARGEM)
+#   metade_baixo[c], metade_esquerda[c] -> lados usados pelo IA_burra
+#   celulas      -> as células de dentro, coluna por coluna (a ordem das posições em
+#                   pixels ordenadas do jogo antigo)
+# Cada tabela é montada linha por linha com operações de bytes, sem laço por célula.
+MARGEM = 2
+
+
+# Os 350 de 600 pixels do IA_burra original, proporcionais ao tabuleiro: no 30x30 é
+# metade_baixo a partir da linha 18 e metade_esquerda até a coluna 17
+def metade_baixo(y, altura):
+    return 12*y > 7*altura
+
+
+def metade_esquerda(x, largura):
+    return 12*x < 7*largura
+
+
+class Tabuleiro:
+
+    def __init__(self, largura, altura):
+        self.largura = largura
+        self.altura = altura
+        self.colunas = colunas = largura + 2*MARGEM
+        linhas = altura + 2*MARGEM
+        self.n_celulas = colunas*linhas
+        self.deslocamentos = (-colunas, colunas, 1, -1)
+
+        xs = range(-MARGEM, largura + MARGEM)
+        ys = range(-MARGEM, altura + MARGEM)
+        self.x = array("i", xs)*linhas
+        self.y = array("i")
+        for y in ys:
+            self.y.extend(array("i", [y])*colunas)
+
+        # Linhas de fora e de dentro, repetidas
+        linha_fora = bytes([1])*colunas
+        linha_dentro = bytes([1])*MARGEM + bytes(largura) + bytes([1])*MARGEM
+        self.fora = bytearray().join(linha_dentro if 0 <= y < altura else linha_fora for y in ys)
+
+        paredes_x = bytes(((x <= 1) << 3) | ((x >= largura - 1) << 2) for x in xs)
+        self.paredes = bytearray().join(
+            bytes(p | ((y >= altura - 1) << 1) | (y <= 1) for p in paredes_x) if y >= altura - 1 or y <= 1 else paredes_x
+            for y in ys)
+
+        esquerda = bytes(metade_esquerda(x, largura) for x in xs)
+        self.metade_esquerda = esquerda*linhas
+        self.metade_baixo = bytearray().join(bytes([metade_baixo(y, altura)])*colunas for y in ys)
+
+        self.celulas = array("q")
+        for x in range(largura):
+            self.celulas.extend(range(MARGEM*colunas + x + MARGEM, (altura + MARGEM)*colunas, colunas))
+
+
+    # Um jogo salvo (checkpoint) guarda só o tamanho; as tabelas são remontadas ou
+    # reaproveitadas na volta
+    def __reduce__(self):
+        return (tabuleiro, (self.largura, self.altura))
+
+
+    def celula(self, x, y):
+        return (y + MARGEM)*self.colunas + x + MARGEM
+
+
+    def vizinho(self, c, acao):
+        return c + self.deslocamentos[acao]
+
+
+    # Só para desenhar e para quem ainda usa pixels
+    def pixel(self, c):
+        return (self.x[c]*snake_block, self.y[c]*snake_block)
+
+
+    def de_pixel(self, posicao):
+        return self.celula(posicao[0]//snake_block, posicao[1]//snake_block)
+
+
+_tabuleiros = {}
+
+def tabuleiro(largura=LARGURA, altura=ALTURA):
+    if (largura, altura) not in _tabuleiros:
+        _tabuleiros[(largura, altura)] = Tabuleiro(largura, altura)
+    return _tabuleiros[(largura, altura)]
+
+
+# Deslocamento em pixels de cada ação de ACOES, e PARADA -> (0, 0)
+VETORES = ((0, -snake_block), (0, snake_block), (snake_block, 0), (-snake_block, 0), (0, 0))
+ACAO_DO_VETOR = {vetor: i for i, vetor in enumerate(VETORES)}
+
+# Ação contrária (voltar por cima do pescoço)
+CONTRARIA = (1, 0, 3, 2, PARADA)
+#--------------------------------------------------------------------------#
+
+
+
+
+#-----------------------------Células livres-------------------------------#
+# Lista indexável das células que não são corpo, com a posição de cada uma numa
+# lista do tamanho da grade (-1 quando não está livre). Tirar uma célula troca ela
+# com a última da lista, então sortear, tirar e devolver células custa O(1), sem
+# recriar o conjunto a cada comida. As duas listas são arrays de inteiros, 8 bytes
+# por célula. sortear(rng) usa um número de rng.random().
+class CelulasLivres:
+
+    def __init__(self, celulas, n_celulas):
+        self.celulas = array("q", celulas)
+        self.posicao = array("q", [-1])*n_celulas
+        for i, celula in enumerate(self.celulas):
+            self.posicao[celula] = i
+
+
+    def __len__(self):
+        return len(self.celulas)
+
+
+    def __contains__(self, celula):
+        return self.posicao[celula] >= 0
+
+
+    def remover(self, celula):
+        i = self.posicao[celula]
+        self.posicao[celula] = -1
+        ultima = self.celulas.pop()
+        if ultima != celula:
+            self.celulas[i] = ultima
+            self.posicao[ultima] = i
+
+
+    def adicionar(self, celula):
+        self.posicao[celula] = len(self.celulas)
+        self.celulas.append(celula)
+
+
+    def sortear(self, rng=random):
+        return self.celulas[int(rng.random()*len(self.celulas))]
+#--------------------------------------------------------------------------#
+
+
+
+
+#------------------------------Regras do jogo------------------------------#
+# Um jogo da cobrinha sem nada de pygame: só células, corpo, comida e regras.
+# Pode ser importado por processos sem tela.
+#
+# step_acao(acao) move a cabeça para o vizinho na direção de ACOES[acao] (PARADA não
+# move) e devolve a lista de eventos que aconteceram, na mesma ordem em que o laço
+# original os verificava:
+#   "parede" -> bateu na borda
+#   "comida" -> comeu
+#   "corpo"  -> bateu no próprio corpo
+#   "limite" -> max_passos passos sem comer
+# passos conta os passos desde a última comida e passos_episodio desde o reset.
+# step(snake_x_change, snake_y_change) faz o mesmo a partir do vetor em pixels.
+#
+# Cada jogo tem o seu gerador (jogo.rng, um Aleatorio com a semente dada), usado só
+# para a posição inicial e para a comida. Com a mesma semente o jogo se repete igual, e
+# um jogo salvo continua a mesma sequência.
+#
+# largura e altura são o tamanho do tabuleiro em células. Nenhum passo percorre o
+# tabuleiro: o custo de um passo não depende do tamanho dele, só a montagem das
+# tabelas (uma vez por tamanho) e das células livres (uma vez por jogo criado).
+#
+# O corpo fica num deque de células (cabeça entra à direita, cauda sai à esquerda) e
+# a ocupação num bytearray do tamanho da grade, então perguntar se uma célula é corpo
+# custa O(1) qualquer que seja o tamanho da cobrinha. As células livres ficam num
+# CelulasLivres mantido junto com o corpo, de onde saem a comida e a posição inicial.
+#
+# Com uma lista em jogo.sorteios cada célula sorteada (posição inicial e comida) é
+# anotada nela; é o que a gravação de episódios guarda junto com as ações (gravacao.py).
+#
+# snake_x, snake_y, food_x, food_y, snake_x_change, snake_y_change e snake_list em
+# pixels continuam disponíveis como propriedades, calculadas na hora.
+#
+# Com um Cronometro em jogo.cronometro o sorteio da comida é marcado separado do resto
+# do movimento.
+class SnakeGame:
+
+    cronometro = None
+    sorteios = None
+    max_passos = 1000
+
+    def __init__(self, largura=LARGURA, altura=ALTURA, max_passos=1000, semente=None):
+        self.tabuleiro = tabuleiro(largura, altura)
+        self.max_passos = max_passos
+        self.rng = Aleatorio(semente)
+        self.livres = CelulasLivres(self.tabuleiro.celulas, self.tabuleiro.n_celulas)
+        self.ocupado = bytearray(self.tabuleiro.n_celulas)
+        self.snake_list_celulas = deque()
+        self.reset()
+
+
+    def reset(self):
+        # Fim de jogo
+        self.game_over = False
+
+        # Devolver o corpo do episódio anterior para as células livres. A ordem do deque
+        # mantém a ordem das livres (e o sorteio) reproduzível.
+        fora = self.tabuleiro.fora
+        for celula in self.snake_list_celulas:
+            self.ocupado[celula] = 0
+            if not fora[celula] and celula not in self.livres:
+                self.livres.adicionar(celula)
+
+        # Cobrinha
+        self.snake_list_celulas = deque()
+        self.direcao = PARADA
+        self.cabeca = self.sortear_livre()
+        self.snake_list_celulas.append(self.cabeca)
+        self.ocupado[self.cabeca] = 1
+        self.livres.remover(self.cabeca)
+        self.length_of_snake = 1
+        self.passos = 0
+        self.passos_episodio = 0
+
+        # Comida
+        self.comida = self.sortear_livre()
+
+        # Pontuação
+        self.score = 1
+
+        # Memória do IA_burra
+        self.tentar_vertical = 0
+
+
+    def sortear_livre(self):
+        celula = self.livres.sortear(self.rng)
+        if self.sorteios is not None:
+            self.sorteios.append(celula)
+        return celula
+
+
+    # Jogos salvos antes de cada jogo ter o seu gerador (ou sem passos_episodio, ou com
+    # só a contagem n_livres no lugar das células livres) são completados na volta
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        if "rng" not in estado:
+            self.rng = Aleatorio()
+        if "passos_episodio" not in estado:
+            self.passos_episodio = 0
+        if "livres" not in estado:
+            self.__dict__.pop("n_livres", None)
+            self.livres = CelulasLivres((c for c in self.tabuleiro.celulas if not self.ocupado[c]), self.tabuleiro.n_celulas)
+
+
+    def step(self, snake_x_change, snake_y_change):
+        return self.step_acao(ACAO_DO_VETOR[(snake_x_change, snake_y_change)])
+
+
+    def step_acao(self, acao):
+        eventos = []
+        tabuleiro = self.tabuleiro
+        self.direcao = acao
+
+        # Atualizar posição da cobrinha
+        if acao != PARADA:
+            self.cabeca += tabuleiro.deslocamentos[acao]
+        cabeca = self.cabeca
+
+        # Terminar o jogo quando a cobrinha encosta nas bordas.
+        if tabuleiro.fora[cabeca]:
+            self.game_over = True
+            eventos.append("parede")
+
+        # A nova posição da comida só é sorteada depois que a cabeça entra no corpo
+        comeu = cabeca == self.comida
+        if comeu:
+            self.length_of_snake += 1
+            self.score += 1
+            self.passos = 0
+            eventos.append("comida")
+
+        # Nova cabeça. O corpo ainda inclui a cauda, que só sai depois.
+        corpo = self.snake_list_celulas
+        if len(corpo) == 1 and corpo[0] == cabeca:
+            # Cobrinha parada, nada muda
+            pass
+        else:
+            if self.ocupado[cabeca]:
+                self.game_over = True
+                eventos.append("corpo")
+
+            if cabeca in self.livres:
+                self.livres.remover(cabeca)
+            corpo.append(cabeca)
+            self.ocupado[cabeca] = 1
+
+            if len(corpo) > self.length_of_snake:
+                cauda = corpo.popleft()
+                if cauda != cabeca:
+                    self.ocupado[cauda] = 0
+                    self.livres.adicionar(cauda)
+
+        # Sortear nova posição da comida quando a cobrinha come
+        if comeu:
+            if self.cronometro is not None:
+                self.cronometro.marcar("fisica")
+            if len(self.livres) > 0:
+                self.comida = self.sortear_livre()
+            else:
+                # Tabuleiro cheio, não há onde colocar a comida
+                self.game_over = True
+            if self.cronometro is not None:
+                self.cronometro.marcar("comida")
+
+        self.passos += 1
+        self.passos_episodio += 1
+        if self.passos == self.max_passos:
+            self.game_over = True
+            eventos.append("limite")
+
+        return eventos
+
+
+    # Distância ao quadrado da cabeça até a comida, em pixels (a escala da recompensa
+    # por aproximação dos scripts)
+    def distancia2(self):
+        tabuleiro = self.tabuleiro
+        dx = tabuleiro.x[self.cabeca] - tabuleiro.x[self.comida]
+        dy = tabuleiro.y[self.cabeca] - tabuleiro.y[self.comida]
+        return (dx*dx + dy*dy)*snake_block*snake_block
+
+
+    # Pixels, calculados a partir das células
+    @property
+    def snake_x(self):
+        return self.tabuleiro.x[self.cabeca]*snake_block
+
+    @property
+    def snake_y(self):
+        return self.tabuleiro.y[self.cabeca]*snake_block
+
+    @property
+    def food_x(self):
+        return self.tabuleiro.x[self.comida]*snake_block
+
+    @property
+    def food_y(self):
+        return self.tabuleiro.y[self.comida]*snake_block
+
+    @property
+    def snake_x_change(self):
+        return VETORES[self.direcao][0]
+
+    @property
+    def snake_y_change(self):
+        return VETORES[self.direcao][1]
+
+    @property
+    def snake_list(self):
+        return [self.tabuleiro.pixel(c) for c in self.snake_list_celulas]
+#--------------------------------------------------------------------------#
+
+
+
+
+#------------------------Estados de jogo da cobrinha-----------------------#
+# O estado são 12 bits, na mesma ordem dos dígitos da string antiga:
+#   comida (esquerda, direita, abaixo, acima)
+#   movimento (esquerda, direita, baixo, cima)
+#   perigo (esquerda, direita, baixo, cima)
+# O primeiro dígito da string é o bit mais alto, então int(state, 2) dá o inteiro.
+FOOD_LEFT = 1 << 11
+FOOD_RIGHT = 1 << 10
+FOOD_DOWN = 1 << 9
+FOOD_UP = 1 << 8
+GOING_LEFT = 1 << 7
+GOING_RIGHT = 1 << 6
+GOING_DOWN = 1 << 5
+GOING_UP = 1 << 4
+DANGER_LEFT = 1 << 3
+DANGER_RIGHT = 1 << 2
+DANGER_DOWN = 1 << 1
+DANGER_UP = 1 << 0
+
+N_ESTADOS = 1 << 12
+
+
+# Bits de movimento de cada direção de ACOES (PARADA não tem nenhum)
+BITS_DIRECAO = (GOING_UP, GOING_DOWN, GOING_RIGHT, GOING_LEFT, 0)
+
+
+# Os bits de perigo de ACOES[a] são 1 << a, então o perigo de corpo é a ocupação dos
+# vizinhos na ordem de ACOES e o de parede vem pronto de tabuleiro.paredes.
+def make_state_int(jogo):
+    tabuleiro = jogo.tabuleiro
+    cabeca, comida = jogo.cabeca, jogo.comida
+    x, y = tabuleiro.x, tabuleiro.y
+    ocupado = jogo.ocupado
+    colunas = tabuleiro.colunas
+
+    # Posicao da comida relativa a cobrinha
+    state = ((x[cabeca] > x[comida]) << 11) | ((x[cabeca] < x[comida]) << 10) | ((y[cabeca] < y[comida]) << 9) | ((y[cabeca] > y[comida]) << 8)
+
+    # Direção que a cobrinha está se movendo
+    state |= BITS_DIRECAO[jogo.direcao]
+
+    """"
+    Perigos #1: Paredes
+    Perigos #2: Corpo
+    """
+    state |= (tabuleiro.paredes[cabeca] | (ocupado[cabeca - 1] << 3) | (ocupado[cabeca + 1] << 2)
+              | (ocupado[cabeca + colunas] << 1) | ocupado[cabeca - colunas])
+
+    return state
+
+
+# A forma em string continua disponível para logs e para as tabelas antigas
+def state_to_str(state):
+    return format(state, "012b")
+
+
+def str_to_state(state):
+    return int(state, 2)
+
+
+def make_state(jogo):
+    return state_to_str(make_state_int(jogo))
+
+
+# Converte um ia_Q (ou ia_N_S_A, ia_N_S) com estados em string para estados inteiros
+def tabela_para_int(tabela):
+    return {str_to_state(s): valor for s, valor in tabela.items()}
+#--------------------------------------------------------------------------#
+
+
+
+
+#---------------------------Ações e vetores--------------------------------#
+def get_action_vector(action):
+    if action == "LEFT":
+        return [-snake_block, 0]
+
+    elif action == "RIGHT":
+        return [snake_block, 0]
+
+    elif action == "DOWN":
+        return [0, +snake_block]
+
+    elif action == "UP":
+        return [0, -snake_block]
+
+
+def direcao_atual(jogo):
+    return jogo.direcao
+
+
+def get_vector_action(snake_vector):
+    if snake_vector == [-snake_block, 0]:
+        return "LEFT"
+
+    elif snake_vector == [snake_block, 0]:
+        return "RIGHT"
+
+    elif snake_vector == [0, +snake_block]:
+        return "DOWN"
+
+    elif snake_vector == [0, -snake_block]:
+        return "UP"
+#--------------------------------------------------------------------------#
+
+
+
+
+#----------------------------Heurística gulosa-----------------------------#
+# Persegue a comida: primeiro na horizontal, depois na vertical, desviando do corpo
+# para o lado do tabuleiro que tem mais espaço. Devolve o índice da ação em ACOES.
+def acao_burra(jogo):
+    tabuleiro = jogo.tabuleiro
+    cabeca = jogo.cabeca
+    ocupado = jogo.ocupado
+    up, down, right, left = cabeca - tabuleiro.colunas, cabeca + tabuleiro.colunas, cabeca + 1, cabeca - 1
+    snake_x, food_x = tabuleiro.x[cabeca], tabuleiro.x[jogo.comida]
+    acao = jogo.direcao
+
+    # Comida a direita
+    if snake_x < food_x:
+        if not ocupado[right]:
+            acao = 2
+        elif tabuleiro.metade_baixo[cabeca]:
+            acao = 0 if not ocupado[up] else 1
+        else:
+            acao = 1 if not ocupado[down] else 0
+
+    # Comida a esquerda
+    elif snake_x > food_x:
+        if not ocupado[left]:
+            acao = 3
+        elif tabuleiro.metade_baixo[cabeca]:
+            acao = 0 if not ocupado[up] else 1
+        else:
+            acao = 1 if not ocupado[down] else 0
+
+    else:
+        snake_y, food_y = tabuleiro.y[cabeca], tabuleiro.y[jogo.comida]
+
+        # Comida abaixo
+        if snake_y < food_y:
+            if not ocupado[down]:
+                jogo.tentar_vertical = 0
+                acao = 1
+            else:
+                jogo.tentar_vertical += 1
+                if tabuleiro.metade_esquerda[cabeca]:
+                    acao = 2 if not ocupado[right] else 3
+                else:
+                    acao = 3 if not ocupado[left] else 2
+
+        # Comida acima
+        if snake_y > food_y:
+            if not ocupado[up]:
+                jogo.tentar_vertical = 0
+                acao = 0
+            else:
+                jogo.tentar_vertical += 1
+                if tabuleiro.metade_esquerda[cabeca]:
+                    acao = 2 if not ocupado[right] else 3
+                else:
+                    acao = 3 if not ocupado[left] else 2
+
+    return acao
+
+
+# A mesma heurística devolvendo o vetor em pixels, como antes
+def IA_burra(jogo):
+    return VETORES[acao_burra(jogo)]
+#--------------------------------------------------------------------------#
@@ -0,0 +1,328 @@
+import time
+from collections import deque
+from itertools import islice
+
+from snake_engine import game_screen_weight, game_screen_width, snake_block
+
+
+
+#-------------------------------Pygame sob demanda-------------------------------#
+# O pygame só é importado e inicializado quando uma Tela é criada, assim quem usa
+# apenas o snake_engine (processos sem tela, por exemplo) não paga por ele.
+pygame = None
+
+def carregar_pygame():
+    global pygame
+    if pygame is None:
+        import pygame as _pygame
+        _pygame.init()
+        pygame = _pygame
+    return pygame
+#--------------------------------------------------------------------------------#
+
+
+
+
+#-------------------------------------Cores--------------------------------------#
+blue = (67,59,103)
+red = (200, 112, 126)
+fundo = [158, 206, 225]
+branco = [255,255,255]
+preto = [0,0,0]
+#--------------------------------------------------------------------------------#
+
+
+
+
+#------------------------------Agente Humano-------------------------------#
+def human_player_agent(event, snake_x_change, snake_y_change):
+    if event.type == pygame.KEYDOWN:
+        if event.key == pygame.K_LEFT:
+            snake_x_change = -snake_block
+            snake_y_change = 0
+        elif event.key == pygame.K_RIGHT:
+            snake_x_change = snake_block
+            snake_y_change = 0
+        elif event.key == pygame.K_UP:
+            snake_y_change = -snake_block
+            snake_x_change = 0
+        elif event.key == pygame.K_DOWN:
+            snake_y_change = snake_block
+            snake_x_change = 0
+
+    return [snake_x_change, snake_y_change]
+#--------------------------------------------------------------------------#
+
+
+
+
+#------------------------------------Textos--------------------------------------#
+# Superfícies de texto guardadas por (texto, cor): cada texto passa pela fonte uma vez
+# só, e desenhar de novo um texto já visto custa um blit. Os textos são guardados
+# inteiros, não letra a letra, porque a fonte posiciona as letras com frações de pixel
+# e letras coladas uma a uma saem deslocadas. Com mais de `maximo` textos guardados
+# (números de episódio, que não se repetem) o cache recomeça.
+class Textos:
+
+    def __init__(self, fonte, maximo=1024):
+        self.fonte = fonte
+        self.maximo = maximo
+        self.superficies = {}
+
+
+    def superficie(self, texto, cor):
+        chave = (texto, tuple(cor))
+        superficie = self.superficies.get(chave)
+        if superficie is None:
+            if len(self.superficies) >= self.maximo:
+                self.superficies.clear()
+            superficie = self.superficies[chave] = self.fonte.render(texto, True, cor)
+        return superficie
+
+
+    # Devolve o retângulo do texto
+    def desenhar(self, superficie, texto, posicao, cor):
+        return superficie.blit(self.superficie(texto, cor), posicao)
+
+
+# Pontuações no alto da tela: rótulo e posição de cada campo
+CAMPOS_PLACAR = (("Score: ", (0, 0)), ("Best Score: ", (150, 0)), ("Ep: ", (400, 0)))
+
+
+# Guarda o valor e o retângulo de cada campo. trocar(valores) devolve, para cada campo
+# que mudou, a área que precisa ser refeita (o texto velho mais o novo); desenhar()
+# coloca os campos que cruzam a área, ou todos.
+class Placar:
+
+    def __init__(self, textos, campos=CAMPOS_PLACAR, cor=branco):
+        self.textos = textos
+        self.campos = campos
+        self.cor = cor
+        self.valores = [None]*len(campos)
+        self.escritos = [""]*len(campos)
+        self.retangulos = [pygame.Rect(posicao, (0, 0)) for _, posicao in campos]
+
+
+    def trocar(self, valores):
+        areas = []
+        for i, valor in enumerate(valores):
+            if valor != self.valores[i]:
+                rotulo, posicao = self.campos[i]
+                self.valores[i] = valor
+                self.escritos[i] = rotulo + str(valor)
+                retangulo = self.textos.superficie(self.escritos[i], self.cor).get_rect(topleft=posicao)
+                areas.append(retangulo.union(self.retangulos[i]))
+                self.retangulos[i] = retangulo
+        return areas
+
+
+    def desenhar(self, superficie, area=None):
+        for (_, posicao), texto, retangulo in zip(self.campos, self.escritos, self.retangulos):
+            if area is None or retangulo.colliderect(area):
+                self.textos.desenhar(superficie, texto, posicao, self.cor)
+#--------------------------------------------------------------------------------#
+
+
+
+
+#-------------------------------Janela do jogo-----------------------------------#
+# comandos() traduz os eventos do pygame para nomes simples, para que os scripts de
+# treino não precisem conhecer as teclas:
+#   "sair", "mais_devagar", "mais_rapido", "mostrar", "esconder", "bot", "ia", "grafico"
+#
+# A tela não segura a simulação: os eventos só são lidos a cada intervalo_eventos
+# segundos e desenhar() pula os quadros que chegam antes de 1/fps segundos do último.
+# Com snake_speed = 0 o tick não espera nada e o treino roda sem limite; mesmo com
+# show_image ligado só fps quadros por segundo são desenhados.
+#
+# Só o que mudou desde o último quadro é desenhado e mandado para a janela: as células
+# que entraram no corpo (as últimas passos_episodio - passos já desenhados do deque), as
+# que saíram (o começo da cópia do corpo que a tela guarda), a comida velha e a nova, e
+# os campos do placar cujos números mudaram. Cada célula suja é pintada com a cor que
+# tem agora no jogo. O quadro inteiro só é desenhado quando o jogo foi reiniciado (outro
+# deque de corpo) ou trocado.
+class Tela:
+
+    def __init__(self, largura=game_screen_weight, altura=game_screen_width, fps=30, intervalo_eventos=0.02):
+        carregar_pygame()
+        self.largura = largura
+        self.altura = altura
+        self.intervalo_quadro = 1/fps
+        self.intervalo_eventos = intervalo_eventos
+        self.ultimo_quadro = 0
+        self.ultimos_eventos = 0
+
+        # Inicializando objeto
+        self.game_screen = pygame.display.set_mode((largura, altura))
+        pygame.display.update()
+
+        # Usado para congelar o tempo da repetição do laço while um tempo.
+        self.clock = pygame.time.Clock()
+
+        # A fonte (e os textos e o placar feitos com ela) só é carregada no primeiro
+        # texto desenhado
+        self.font_style = None
+        self._textos = None
+        self._placar = None
+
+        # O que está desenhado na janela
+        self.corpo_jogo = None
+        self.corpo_pintado = deque()
+        self.passos_pintados = 0
+        self.comida_pintada = None
+
+        self.teclas = {
+            pygame.K_KP_MINUS: "mais_devagar",
+            pygame.K_KP_PLUS: "mais_rapido",
+            pygame.K_s: "mostrar",
+            pygame.K_f: "esconder",
+            pygame.K_b: "bot",
+            pygame.K_i: "ia",
+            pygame.K_g: "grafico",
+        }
+
+
+    def fonte(self):
+        if self.font_style is None:
+            self.font_style = pygame.font.SysFont(None, 50)
+        return self.font_style
+
+
+    def textos(self):
+        if self._textos is None:
+            self._textos = Textos(self.fonte())
+        return self._textos
+
+
+    def placar(self):
+        if self._placar is None:
+            self._placar = Placar(self.textos())
+        return self._placar
+
+
+    def comandos(self):
+        comandos = []
+        agora = time.perf_counter()
+        if agora - self.ultimos_eventos < self.intervalo_eventos:
+            return comandos
+        self.ultimos_eventos = agora
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                comandos.append("sair")
+                break
+
+            if event.type == pygame.KEYDOWN and event.key in self.teclas:
+                comandos.append(self.teclas[event.key])
+        return comandos
+
+
+    def show_text(self, text, color):
+        pygame.display.update(self.textos().desenhar(self.game_screen, text, [self.largura/2 - 100, self.altura/2 - 50], color))
+
+
+    # Devolve False quando o quadro foi pulado
+    def desenhar(self, jogo, max_score, episode_count):
+        agora = time.perf_counter()
+        if agora - self.ultimo_quadro < self.intervalo_quadro:
+            return False
+        self.ultimo_quadro = agora
+
+        if jogo.snake_list_celulas is not self.corpo_jogo or jogo.passos_episodio < self.passos_pintados:
+            self.desenhar_tudo(jogo, max_score, episode_count)
+        else:
+            self.desenhar_mudancas(jogo, max_score, episode_count)
+        return True
+
+
+    def desenhar_tudo(self, jogo, max_score, episode_count):
+        # Limpar a tela antes de colocar na tela a nova posição da cobrinha e da comida.
+        self.game_screen.fill(fundo)
+        for celula in jogo.snake_list_celulas:
+            self.game_screen.fill(blue, self.retangulo(jogo, celula))
+        self.game_screen.fill(red, self.retangulo(jogo, jogo.comida))
+
+        placar = self.placar()
+        placar.trocar((jogo.score, max_score, episode_count))
+        placar.desenhar(self.game_screen)
+        pygame.display.update()
+
+        self.corpo_jogo = jogo.snake_list_celulas
+        self.corpo_pintado = deque(jogo.snake_list_celulas)
+        self.passos_pintados = jogo.passos_episodio
+        self.comida_pintada = jogo.comida
+
+
+    def desenhar_mudancas(self, jogo, max_score, episode_count):
+        corpo = jogo.snake_list_celulas
+        pintado = self.corpo_pintado
+
+        # Entram as últimas células do corpo, uma por passo; sai do começo da cópia o que
+        # sobra para ela ficar do tamanho do corpo
+        entram = min(jogo.passos_episodio - self.passos_pintados, len(corpo))
+        saem = len(pintado) + entram - len(corpo)
+        if not 0 <= saem <= len(pintado):
+            self.desenhar_tudo(jogo, max_score, episode_count)
+            return
+        sujas = [pintado.popleft() for _ in range(saem)]
+        novas = list(islice(reversed(corpo), entram))
+        novas.reverse()
+        pintado.extend(novas)
+        sujas.extend(novas)
+        self.passos_pintados = jogo.passos_episodio
+
+        if jogo.comida != self.comida_pintada:
+            sujas.append(self.comida_pintada)
+            sujas.append(jogo.comida)
+            self.comida_pintada = jogo.comida
+
+        retangulos = [self.pintar(jogo, celula) for celula in sujas]
+
+        # O placar fica por cima das células: a área dos campos que mudaram e as células
+        # pintadas por cima de algum campo são refeitas com o fundo, as células e o texto
+        placar = self.placar()
+        areas = placar.trocar((jogo.score, max_score, episode_count))
+        areas.extend(r for r in retangulos if r.collidelist(placar.retangulos) >= 0)
+        for area in areas:
+            self.refazer_area(jogo, area)
+        retangulos.extend(areas)
+
+        pygame.display.update(retangulos)
+
+
+    def retangulo(self, jogo, celula):
+        x, y = jogo.tabuleiro.pixel(celula)
+        return pygame.Rect(x, y, snake_block, snake_block)
+
+
+    # Pinta a célula com a cor que ela tem agora no jogo e devolve o retângulo
+    def pintar(self, jogo, celula):
+        cor = fundo
+        if celula == jogo.comida:
+            cor = red
+        elif jogo.ocupado[celula]:
+            cor = blue
+        return self.game_screen.fill(cor, self.retangulo(jogo, celula))
+
+
+    # Redesenha só dentro da área: fundo, células e os campos do placar que passam por ela
+    def refazer_area(self, jogo, area):
+        tela = self.game_screen
+        tela.set_clip(area)
+        tela.fill(fundo, area)
+        tabuleiro = jogo.tabuleiro
+        for y in range(max(area.top//snake_block, 0), min((area.bottom - 1)//snake_block + 1, tabuleiro.altura)):
+            for x in range(max(area.left//snake_block, 0), min((area.right - 1)//snake_block + 1, tabuleiro.largura)):
+                self.pintar(jogo, tabuleiro.celula(x, y))
+        self.placar().desenhar(tela, area)
+        tela.set_clip(None)
+
+
+    def tick(self, snake_speed):
+        if snake_speed > 0:
+            self.clock.tick(snake_speed)
+
+
+    def fechar(self):
+        pygame.quit()
+#--------------------------------------------------------------------------------#
@@ -0,0 +1,290 @@
+import numpy as np
+
+from snake_engine import PARADA, metade_baixo, metade_esquerda
+
+
+
+#-------------------------------Ações e direções--------------------------------#
+# Deslocamento de cada ação de ACOES, em células
+DX = np.array([0, 0, 1, -1])
+DY = np.array([-1, 1, 0, 0])
+#--------------------------------------------------------------------------------#
+
+
+
+
+#----------------------------Recompensas e fim de jogo---------------------------#
+# Mesmos valores do Snake_game_igor_Q_learning.py
+RECOMPENSA_PASSO = 0.01
+RECOMPENSA_COMIDA = 10
+RECOMPENSA_MORTE = -20
+RECOMPENSA_LIMITE = -30
+
+# Causa do fim de cada jogo
+VIVO = 0
+PAREDE = 1
+CORPO = 2
+LIMITE = 3
+CHEIO = 4
+#--------------------------------------------------------------------------------#
+
+
+
+
+#----------------------------Vários jogos ao mesmo tempo-------------------------#
+# Guarda o estado de n_envs jogos em arrays e avança todos com um único step(acoes).
+# As regras são as mesmas do laço dos scripts de treino: morte na parede, morte ao
+# encostar no corpo (incluindo a cauda, que ainda não saiu do lugar), crescimento ao
+# comer e fim do episódio quando passos chega em max_passos sem comer.
+# Jogos que terminam são reiniciados na hora, no mesmo lugar do array.
+#
+# As posições são índices de célula (coluna, linha), não pixels: a célula (x, y)
+# corresponde ao pixel (x*snake_block, y*snake_block) dos scripts.
+#
+# estados() codifica todos os jogos de uma vez como os inteiros de make_state_int.
+# Depois de um step, os jogos que terminaram já mostram o estado do jogo novo.
+class SnakeVecEnv:
+
+    def __init__(self, n_envs, largura=30, altura=30, max_passos=1000, semente=None):
+        self.n_envs = n_envs
+        self.largura = largura
+        self.altura = altura
+        self.n_celulas = largura*altura
+        self.max_passos = max_passos
+        self.rng = np.random.default_rng(semente)
+
+        # Corpo de cada jogo num buffer circular de células. Os segmentos vivos estão
+        # entre cauda e topo (topo é onde a próxima cabeça vai entrar).
+        self.corpo = np.zeros((n_envs, self.n_celulas), dtype=np.int32)
+        self.cauda = np.zeros(n_envs, dtype=np.int64)
+        self.topo = np.zeros(n_envs, dtype=np.int64)
+
+        # Mapa de ocupação, para saber em O(1) se uma célula é corpo
+        self.ocupado = np.zeros((n_envs, self.n_celulas), dtype=bool)
+
+        # Células livres de cada jogo: as n_livres primeiras de livres[i], em qualquer
+        # ordem, e pos_livre[i, celula] diz onde cada uma está. Sortear, tirar (troca
+        # com a última) e devolver uma célula custa O(1).
+        self.livres = np.tile(np.arange(self.n_celulas, dtype=np.int32), (n_envs, 1))
+        self.pos_livre = self.livres.copy()
+        self.n_livres = np.full(n_envs, self.n_celulas, dtype=np.int64)
+
+        self.snake_x = np.zeros(n_envs, dtype=np.int64)
+        self.snake_y = np.zeros(n_envs, dtype=np.int64)
+        self.food_x = np.zeros(n_envs, dtype=np.int64)
+        self.food_y = np.zeros(n_envs, dtype=np.int64)
+        self.direcao = np.full(n_envs, PARADA, dtype=np.int64)
+        self.score = np.ones(n_envs, dtype=np.int64)
+        self.passos = np.zeros(n_envs, dtype=np.int64)
+
+        # Memória do IA_burra de cada jogo
+        self.tentar_vertical = np.zeros(n_envs, dtype=np.int64)
+
+        self._todos = np.arange(n_envs)
+        self.reset()
+
+
+    def reset(self, indices=None):
+        if indices is None:
+            indices = self._todos
+        indices = np.asarray(indices)
+        if indices.size == 0:
+            return
+
+        # Limpa só as células do corpo, sem varrer o tabuleiro inteiro, e as devolve
+        # para o fim da lista de livres
+        tamanhos = self.topo[indices] - self.cauda[indices]
+        linhas = np.repeat(indices, tamanhos)
+        deslocamentos = np.arange(tamanhos.sum()) - np.repeat(np.cumsum(tamanhos) - tamanhos, tamanhos)
+        posicoes = (np.repeat(self.cauda[indices], tamanhos) + deslocamentos) % self.n_celulas
+        celulas = self.corpo[linhas, posicoes]
+        self.ocupado[linhas, celulas] = False
+        destino = np.repeat(self.n_livres[indices], tamanhos) + deslocamentos
+        self.livres[linhas, destino] = celulas
+        self.pos_livre[linhas, celulas] = destino
+        self.n_livres[indices] += tamanhos
+
+        # Cobrinha
+        sorteio = (self.rng.random(indices.size)*self.n_livres[indices]).astype(np.int64)
+        celulas = self.livres[indices, sorteio]
+        self._ocupar(indices, celulas)
+        self.snake_x[indices] = celulas % self.largura
+        self.snake_y[indices] = celulas // self.largura
+        self.corpo[indices, 0] = celulas
+        self.cauda[indices] = 0
+        self.topo[indices] = 1
+        self.direcao[indices] = PARADA
+        self.score[indices] = 1
+        self.passos[indices] = 0
+        self.tentar_vertical[indices] = 0
+
+        # Comida
+        self._sortear_comida(indices)
+
+
+    # Cada linha aparece no máximo uma vez em indices
+    def _ocupar(self, indices, celulas):
+        self.ocupado[indices, celulas] = True
+        posicoes = self.pos_livre[indices, celulas]
+        ultimas = self.livres[indices, self.n_livres[indices] - 1]
+        self.livres[indices, posicoes] = ultimas
+        self.pos_livre[indices, ultimas] = posicoes
+        self.n_livres[indices] -= 1
+
+
+    def _liberar(self, indices, celulas):
+        self.ocupado[indices, celulas] = False
+        self.livres[indices, self.n_livres[indices]] = celulas
+        self.pos_livre[indices, celulas] = self.n_livres[indices]
+        self.n_livres[indices] += 1
+
+
+    def _sortear_comida(self, indices):
+        sorteio = (self.rng.random(indices.size)*self.n_livres[indices]).astype(np.int64)
+        celulas = self.livres[indices, sorteio]
+        self.food_x[indices] = celulas % self.largura
+        self.food_y[indices] = celulas // self.largura
+
+
+    # Estado de todos os jogos no mesmo formato de make_state_int do snake_engine
+    def estados(self):
+        x, y = self.snake_x, self.snake_y
+        L, A = self.largura, self.altura
+        linhas = self._todos
+
+        # Vizinhos fora do tabuleiro já são parede; o clip só evita índice inválido
+        body_left = self.ocupado[linhas, y*L + np.maximum(x - 1, 0)]
+        body_right = self.ocupado[linhas, y*L + np.minimum(x + 1, L - 1)]
+        body_down = self.ocupado[linhas, np.minimum(y + 1, A - 1)*L + x]
+        body_up = self.ocupado[linhas, np.maximum(y - 1, 0)*L + x]
+
+        state = (x > self.food_x).astype(np.int64) << 11
+        state |= (x < self.food_x).astype(np.int64) << 10
+        state |= (y < self.food_y).astype(np.int64) << 9
+        state |= (y > self.food_y).astype(np.int64) << 8
+
+        state |= (self.direcao == 3).astype(np.int64) << 7
+        state |= (self.direcao == 2).astype(np.int64) << 6
+        state |= (self.direcao == 1).astype(np.int64) << 5
+        state |= (self.direcao == 0).astype(np.int64) << 4
+
+        state |= ((x <= 1) | body_left).astype(np.int64) << 3
+        state |= ((x >= L - 1) | body_right).astype(np.int64) << 2
+        state |= ((y >= A - 1) | body_down).astype(np.int64) << 1
+        state |= ((y <= 1) | body_up).astype(np.int64)
+        return state
+
+
+    # Ação do IA_burra para cada jogo
+    def acoes_burra(self):
+        return ia_burra_lote(self.snake_x, self.snake_y, self.food_x, self.food_y, self.direcao,
+                             self.ocupado, self.largura, self.altura, self.tentar_vertical)
+
+
+    def step(self, acoes):
+        acoes = np.asarray(acoes)
+        C = self.n_celulas
+
+        # Atualizar posição da cobrinha
+        x = self.snake_x + DX[acoes]
+        y = self.snake_y + DY[acoes]
+        parede = (x < 0) | (x >= self.largura) | (y < 0) | (y >= self.altura)
+        celula = np.where(parede, 0, y*self.largura + x)
+
+        # O corpo ainda inclui a cauda, como no laço original
+        corpo = self.ocupado[self._todos, celula] & ~parede
+        comeu = (x == self.food_x) & (y == self.food_y) & ~parede
+        vivo = ~(parede | corpo)
+
+        # Quem não comeu perde a cauda
+        anda = np.flatnonzero(vivo & ~comeu)
+        self._liberar(anda, self.corpo[anda, self.cauda[anda] % C])
+        self.cauda[anda] += 1
+
+        # Cabeça nova
+        vivos = np.flatnonzero(vivo)
+        self.corpo[vivos, self.topo[vivos] % C] = celula[vivos]
+        self._ocupar(vivos, celula[vivos])
+        self.topo[vivos] += 1
+        self.snake_x = np.where(vivo, x, self.snake_x)
+        self.snake_y = np.where(vivo, y, self.snake_y)
+        self.direcao = np.where(vivo, acoes, self.direcao)
+
+        self.score += comeu
+        self.passos = np.where(comeu, 0, self.passos) + 1
+        limite = self.passos == self.max_passos
+
+        # Tabuleiro cheio: não há onde colocar a comida
+        cheio = comeu & (self.n_livres == 0)
+
+        recompensas = np.where(comeu, RECOMPENSA_COMIDA, RECOMPENSA_PASSO)
+        recompensas = np.where(vivo, recompensas, RECOMPENSA_MORTE)
+        recompensas = np.where(limite, RECOMPENSA_LIMITE, recompensas)
+
+        causas = np.full(self.n_envs, VIVO)
+        causas[limite] = LIMITE
+        causas[cheio] = CHEIO
+        causas[corpo] = CORPO
+        causas[parede] = PAREDE
+        terminou = causas != VIVO
+        scores = self.score.copy()
+
+        # Sortear nova posição da comida para quem comeu e continua jogando
+        self._sortear_comida(np.flatnonzero(comeu & ~terminou))
+
+        # Reiniciar os jogos que acabaram
+        self.reset(np.flatnonzero(terminou))
+
+        return recompensas, terminou, causas, scores
+#--------------------------------------------------------------------------------#
+
+
+
+
+#-------------------------------IA_burra em lote---------------------------------#
+# A mesma decisão do acao_burra do snake_engine para vários jogos de uma vez, sem
+# nenhum if por jogo: cada ramo da árvore original é calculado para todos e o
+# np.select fica com o ramo de cada um. x, y, food_x, food_y e direcao são arrays
+# (células), ocupado é (n_jogos, largura*altura). tentar_vertical guarda a memória
+# de cada jogo e é atualizado no lugar. Devolve os índices das ações em ACOES.
+def ia_burra_lote(x, y, food_x, food_y, direcao, ocupado, largura, altura, tentar_vertical):
+    linhas = np.arange(len(x))
+
+    # Vizinhos fora do tabuleiro contam como livres, como no jogo de um só
+    def livre(vx, vy):
+        dentro = (vx >= 0) & (vx < largura) & (vy >= 0) & (vy < altura)
+        celula = np.where(dentro, vy*largura + vx, 0)
+        return ~(ocupado[linhas, celula] & dentro)
+
+    livre_up = livre(x, y - 1)
+    livre_down = livre(x, y + 1)
+    livre_right = livre(x + 1, y)
+    livre_left = livre(x - 1, y)
+
+    # Os mesmos lados do IA_burra, proporcionais ao tabuleiro
+    baixo = metade_baixo(y, altura)
+    lado_esquerdo = metade_esquerda(x, largura)
+
+    # Comida ao lado: vai na horizontal, ou desvia na vertical
+    desvio_vertical = np.where(baixo, np.where(livre_up, 0, 1), np.where(livre_down, 1, 0))
+    # Comida na mesma coluna: vai na vertical, ou desvia na horizontal
+    desvio_lateral = np.where(lado_esquerdo, np.where(livre_right, 2, 3), np.where(livre_left, 3, 2))
+
+    direita = x < food_x
+    esquerda = x > food_x
+    abaixo = (x == food_x) & (y < food_y)
+    acima = (x == food_x) & (y > food_y)
+    acoes = np.select(
+        [direita, esquerda, abaixo, acima],
+        [np.where(livre_right, 2, desvio_vertical),
+         np.where(livre_left, 3, desvio_vertical),
+         np.where(livre_down, 1, desvio_lateral),
+         np.where(livre_up, 0, desvio_lateral)],
+        direcao)
+
+    seguiu = (abaixo & livre_down) | (acima & livre_up)
+    desviou = (abaixo & ~livre_down) | (acima & ~livre_up)
+    tentar_vertical[seguiu] = 0
+    tentar_vertical[desviou] += 1
+    return acoes
+#--------------------------------------------------------------------------------#